@@ -0,0 +1,68 @@
+import configparser
+import os
+import sqlite3
+import time
+
+"""
+Shared helpers for the benchmark scripts.  Like the tests, these expect the src folder to be on the path.
+"""
+
+# a simple table covering each of the common column types
+PERSON_INI = """
+[Person]
+id = integer, key
+fname = text, required
+lname = text, required
+age = integer
+score = real
+"""
+
+
+def MakeSection(text: str = PERSON_INI, name: str = 'Person') -> configparser.SectionProxy:
+    """
+    Loads an ini snippet and returns one of its sections.
+    :param text: The ini text.
+    :param name: The section to return.
+    :return: The section proxy for the table.
+    """
+    cp = configparser.ConfigParser()
+    cp.read_string(text)
+    return cp[name]
+
+
+def FreshDB(path: str, create: str) -> sqlite3.Connection:
+    """
+    Deletes any old copy of the database file and creates it with a single table.
+    :param path: Location of the database file.
+    :param create: The create statement for the table.
+    :return: An open connection to the new database.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    con = sqlite3.connect(path)
+    con.execute(create)
+    con.commit()
+    return con
+
+
+def Person(i: int) -> dict:
+    """
+    Generates a synthetic row for the person table.
+    """
+    return {'fname': f'first{i}', 'lname': f'last{i % 100}', 'age': i % 90, 'score': i * 0.5}
+
+
+def Timed(func, *args, **kwargs) -> float:
+    """
+    Runs func once and returns the elapsed wall time in seconds.
+    """
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def Report(name: str, rows: int, seconds: float):
+    """
+    Prints one line of results.
+    """
+    print(f'{name:<36} {rows:>10} rows {seconds:>10.4f} s {rows / seconds if seconds else 0:>14.0f} rows/s')
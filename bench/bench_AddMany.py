@@ -0,0 +1,39 @@
+import sys
+
+from Common import *
+from Tables import Table
+
+"""
+Compares inserting rows one at a time with Add against the batched AddMany.
+
+    python bench_AddMany.py [rows]
+"""
+
+DB_FILE = './bench_addmany.db'
+CREATE = 'Create Table Person (id integer primary key, fname text not null, lname text not null, age integer, ' \
+         'score real);'
+
+
+def run(rows: int):
+    con = FreshDB(DB_FILE, CREATE)
+    t = Table(MakeSection(), con)
+
+    data = [Person(i) for i in range(rows)]
+
+    def loop():
+        for d in data:
+            t.Add(d)
+
+    Report('Add (loop)', rows, Timed(loop))
+    t.Delete()
+
+    for size in [100, 1000, 10000]:
+        Report(f'AddMany (batch_size={size})', rows, Timed(t.AddMany, data, batch_size=size))
+        t.Delete()
+
+    con.close()
+    os.remove(DB_FILE)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
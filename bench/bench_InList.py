@@ -0,0 +1,53 @@
+import os
+import random
+import sys
+
+import Tables
+from Common import *
+from Definitions import ComparisonOps
+from Tables import Table
+
+"""
+Filters a table on a growing list of ids with ComparisonOps.IN, binding every id as its own parameter, then the two
+ways used above Table.InListThreshold - one json array read with json_each, and (json turned off) the temp table.
+
+    python bench_InList.py [rows]
+"""
+
+DB = 'bench_inlist.db'
+REPEAT = 5
+
+
+def run(count: int):
+    con = FreshDB(DB, 'create table Person (id integer primary key, fname text not null, lname text not null, '
+                      'age integer, score real)')
+    table = Table(MakeSection(), con)
+    table.AddMany(Person(i) for i in range(count))
+
+    for size in [1000, 10000, 30000, 100000]:
+        ids = random.sample(range(1, count + 1), min(size, count))
+
+        for name, threshold, use_json in [('bound', len(ids), True), ('json_each', 0, True), ('temp table', 0, False)]:
+            # the choice of json is made once per filter, so filter again after flipping it
+            Tables._JSON_EACH = use_json
+            table.ClearFilters()
+            table.Filter('id', ComparisonOps.IN, ids)
+            table.InListThreshold = threshold
+
+            def work():
+                for _ in range(REPEAT):
+                    table.Get(['id', 'fname'])
+
+            try:
+                Report(f'{name} in-list of {len(ids)}', len(ids) * REPEAT, Timed(work))
+            except sqlite3.OperationalError as e:
+                # past sqlite's limit on the number of parameters
+                print(f'{name} in-list of {len(ids)}: {e}')
+        # end for name
+
+    con.close()
+    os.remove(DB)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 500000)
@@ -0,0 +1,44 @@
+import os
+import sys
+
+from Common import *
+from Tables import Table
+
+"""
+Compares reading pages deep into a table with offset paging against keyset paging (GetPage with after).  Offset paging
+has to step over every row before the page, keyset paging seeks straight to it through the primary key.
+
+    python bench_Paging.py [rows]
+"""
+
+DB = 'bench_paging.db'
+SIZE = 100
+PAGES = 50
+
+
+def run(count: int):
+    con = FreshDB(DB, 'create table Person (id integer primary key, fname text not null, lname text not null, '
+                      'age integer, score real)')
+    table = Table(MakeSection(), con)
+    table.AddMany(Person(i) for i in range(count))
+
+    for depth in [0, count // 2, count - SIZE * PAGES]:
+        def offset():
+            for p in range(PAGES):
+                table.GetPage(['id', 'fname'], 'id', size=SIZE, offset=depth + p * SIZE)
+
+        def keyset():
+            # the id of the row before the first page, as if the earlier pages had been read
+            last = depth
+            for p in range(PAGES):
+                last = table.GetPage(['id', 'fname'], 'id', after=last, size=SIZE)[-1][0]
+
+        Report(f'offset from row {depth}', SIZE * PAGES, Timed(offset))
+        Report(f'keyset from row {depth}', SIZE * PAGES, Timed(keyset))
+
+    con.close()
+    os.remove(DB)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 500000)
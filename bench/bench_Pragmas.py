@@ -0,0 +1,45 @@
+import sys
+import tempfile
+
+from Common import *
+from Database import Database
+
+"""
+Compares write throughput of the default rollback journal against WAL with synchronous=NORMAL.  Each Add commits on
+its own, which is where the journal mode makes the most difference.
+
+    python bench_Pragmas.py [rows]
+"""
+
+SETTINGS = {
+    'default journal': '',
+    'WAL, synchronous=NORMAL': 'pragma.journal_mode = WAL\npragma.synchronous = NORMAL\n',
+    'WAL, tuned': 'pragma.journal_mode = WAL\npragma.synchronous = NORMAL\npragma.cache_size = -20000\n'
+                  'pragma.mmap_size = 268435456\npragma.temp_store = MEMORY\npragma.busy_timeout = 5000\n',
+}
+
+
+def run(rows: int):
+    data = [Person(i) for i in range(rows)]
+
+    for name, pragmas in SETTINGS.items():
+        with tempfile.TemporaryDirectory() as folder:
+            ini = os.path.join(folder, 'bench.ini')
+            with open(ini, 'w') as f:
+                f.write(f'[global]\nfile = {os.path.join(folder, "bench.db")}\n{pragmas}{PERSON_INI}')
+
+            db = Database(ini)
+            person = db.GetTable('Person')
+
+            def loop():
+                for d in data:
+                    person.Add(d)
+
+            Report(f'Add ({name})', rows, Timed(loop))
+            Report(f'AddMany ({name})', rows, Timed(person.AddMany, data, batch_size=100))
+            print(f'    effective: {db.Pragmas}')
+            db.Close()
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+import tracemalloc
+
+from Common import *
+from Tables import Table
+
+"""
+Compares the memory held by the rows GetAll returns as plain tuples, as dicts built by the caller, and as the records
+from Table.UseRecords.  The figures are scaled to a million rows.
+
+    python bench_Records.py [rows]
+"""
+
+DB = 'bench_records.db'
+
+
+def measure(build) -> (float, float):
+    """
+    Runs build under tracemalloc and keeps the result alive until the figure is taken.
+    :return: The bytes still held by the result, and the seconds build took.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    rows = build()
+    seconds = time.perf_counter() - start
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del rows
+    return held, seconds
+
+
+def run(count: int):
+    con = FreshDB(DB, 'create table Person (id integer primary key, fname text not null, lname text not null, '
+                      'age integer, score real)')
+    table = Table(MakeSection(), con)
+    table.AddMany(Person(i) for i in range(count))
+    names = list(table._columns.keys())
+
+    def dicts():
+        return [dict(zip(names, r)) for r in table.GetAll()]
+
+    def records():
+        table.UseRecords()
+        try:
+            return table.GetAll()
+        finally:
+            table.UseRecords(False)
+
+    print(f'{"rows as":<10} {"MB / 1M rows":>14} {"seconds":>10}')
+    for name, build in [('tuple', table.GetAll), ('dict', dicts), ('record', records)]:
+        held, seconds = measure(build)
+        print(f'{name:<10} {held * 1e6 / count / 2 ** 20:>14.1f} {seconds:>10.4f}')
+
+    con.close()
+    os.remove(DB)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,72 @@
+import os
+import subprocess
+import sys
+
+import Database
+from Common import *
+
+"""
+Times opening a Database on an existing file with a few hundred tables, reading the columns from the pragmas against
+parsing every create statement with sqlparse.  The cold starts are separate python processes, so they include the
+imports, the schema read only covers the part inside Database.
+
+    python bench_Startup.py [tables]
+"""
+
+DB = 'bench_startup.db'
+INI = 'bench_startup.ini'
+REPEAT = 5
+
+# run in a new process for each cold start, the src folder comes from PYTHONPATH like for this script
+COLD = 'import Database; Database._TABLE_PRAGMAS = {pragmas}; Database.Database({ini!r}).Close()'
+
+
+def writeIni(count: int):
+    sections = [f'[global]\nfile = {DB}\n']
+    for t in range(count):
+        sections.append(f'[Table{t}]\nid = integer, key\nname = text, required\nparent = integer\namount = real\n'
+                        f'notes = text\nindex.ix_table{t}_parent = parent\n')
+    with open(INI, 'w') as f:
+        f.write('\n'.join(sections))
+
+
+def run(count: int):
+    for path in [DB, INI]:
+        if os.path.exists(path):
+            os.remove(path)
+    writeIni(count)
+
+    # the first open creates the tables, the rest all read them back
+    Database.Database(INI).Close()
+
+    for name, pragmas in [('pragmas', True), ('sqlparse', False)]:
+        code = COLD.format(pragmas=pragmas, ini=INI)
+
+        def cold():
+            for _ in range(REPEAT):
+                subprocess.run([sys.executable, '-c', code], check=True)
+
+        seconds = Timed(cold) / REPEAT
+        print(f'{"cold start, " + name:<36} {count:>6} tables {seconds * 1000:>10.1f} ms')
+    # end for name
+
+    db = Database.Database(INI)
+    with db.Connection() as conn:
+        def pragmas():
+            db._readSchema(conn)
+
+        def parsed():
+            for sql in conn.execute("select sql from sqlite_master where type = 'table'").fetchall():
+                db._parse_create(sql[0])
+
+        for name, read in [('pragmas', pragmas), ('sqlparse', parsed)]:
+            seconds = Timed(lambda: [read() for _ in range(REPEAT)]) / REPEAT
+            print(f'{"schema read, " + name:<36} {count:>6} tables {seconds * 1000:>10.1f} ms')
+    db.Close()
+
+    os.remove(DB)
+    os.remove(INI)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 300)
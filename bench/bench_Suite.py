@@ -0,0 +1,269 @@
+import argparse
+import configparser
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from Database import Database
+from Definitions import ComparisonOps
+from JoinedTable import JoinedTable
+
+"""
+Times the main operations against a synthetic database built from an ini schema (schema.ini by default), and writes
+the results to a json file so runs from different commits can be compared.
+
+For each operation it reports the calls made, the rows read or written per second, the p50 and p99 latency of a single
+call, and the peak memory allocated by a single call.
+
+    python bench_Suite.py [--rows 100000] [--schema schema.ini] [--out results.json] [--compare old.json]
+"""
+
+
+# region Data Generation
+
+def LoadSchema(path: str, folder: str) -> (str, configparser.SectionProxy):
+    """
+    Splits the [bench] section off a schema ini file and writes the rest to a new ini file, with the database in folder.
+    :return: The path of the new ini file and the [bench] section.
+    """
+    config = configparser.ConfigParser()
+    config.read(path)
+
+    settings = configparser.ConfigParser()
+    settings['bench'] = config['bench']
+    config.remove_section('bench')
+    config['global']['file'] = os.path.join(folder, os.path.basename(config['global']['file']))
+
+    ini = os.path.join(folder, 'bench.ini')
+    with open(ini, 'w') as f:
+        config.write(f)
+
+    return ini, settings['bench']
+
+
+def Generate(table, count: int, rng: random.Random, keys: dict = None) -> list:
+    """
+    Makes synthetic rows for a table from its column types.  Text columns repeat every 100 values, so an equals filter
+    on one matches about 1% of the rows, unless the column is unique.
+    :param table: The Table to make the rows for.
+    :param count: The number of rows.
+    :param rng: The random source, seeded so every run makes the same data.
+    :param keys: Map of column names to the number of rows in the table they point at, filled with ids from 1 to that.
+    :return: A list of maps of column names and values.
+    """
+    keys = keys or {}
+    rows = []
+    for i in range(count):
+        row = {}
+        for name, col in table._columns.items():
+            if col.PrimaryKey:
+                continue
+            if name in keys:
+                row[name] = rng.randint(1, keys[name])
+            elif col.ColumnType == 'integer':
+                row[name] = rng.randint(0, 999)
+            elif col.ColumnType == 'real':
+                row[name] = rng.random() * 1000
+            elif col.Unique:
+                row[name] = f'{name}{i}'
+            else:
+                row[name] = f'{name}{rng.randint(0, 99)}'
+        # end for columns
+        rows.append(row)
+    return rows
+
+# endregion
+
+
+# region Measurement
+
+def Measure(func, calls: int, rows: int) -> dict:
+    """
+    Times calls separate calls of func, then runs it once more under tracemalloc for the memory.
+    :param func: Called with the number of the call, returns the number of rows it read or wrote (None to use rows).
+    :param calls: The number of calls to time.
+    :param rows: The rows each call handles, when func doesn't say.
+    :return: The figures for the operation.
+    """
+    times = []
+    total = 0
+    for n in range(calls):
+        start = time.perf_counter()
+        done = func(n)
+        times.append(time.perf_counter() - start)
+        total += rows if done is None else done
+    # end for n
+
+    tracemalloc.start()
+    func(calls)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    seconds = sum(times)
+    times.sort()
+    return {
+        'calls': calls,
+        'rows': total,
+        'seconds': seconds,
+        'calls_per_s': calls / seconds if seconds else 0.0,
+        'rows_per_s': total / seconds if seconds else 0.0,
+        'p50_ms': statistics.median(times) * 1000,
+        'p99_ms': times[min(len(times) - 1, int(len(times) * 0.99))] * 1000,
+        'peak_kb': peak / 1024,
+    }
+
+
+def Run(schema: str, count: int, calls: int, seed: int) -> dict:
+    """
+    Builds the database and times every operation.
+    :return: Map of the operation names to their figures.
+    """
+    rng = random.Random(seed)
+    results = {}
+
+    with tempfile.TemporaryDirectory() as folder:
+        ini, settings = LoadSchema(schema, folder)
+
+        # startup on an empty file creates the tables and indexes
+        def create(n):
+            db = Database(ini)
+            db.Close()
+            os.remove(db.DatabasePath)
+        results['Database open (create)'] = Measure(create, 5, 0)
+
+        db = Database(ini)
+        primary, secondary = [c.strip() for c in settings['join'].split(',')]
+        ptable, pcol = primary.split('.')
+        stable, scol = secondary.split('.')
+        ftable, fcol = settings['filter'].split('.')
+
+        # fill the tables, the primary first so the join column can point at its rows
+        sizes = {}
+        for table in db.tables:
+            size = max(1, int(count * settings.getfloat(table.TableName, 1.0)))
+            sizes[table.TableName] = size
+            keys = {scol: sizes.get(ptable, count)} if table.TableName == stable else {}
+            data = Generate(table, size, rng, keys)
+            results[f'{table.TableName}.AddMany'] = Measure(lambda n: table.AddMany(data), 1, size)
+            # the memory pass added them again, start from a known state
+            table.Delete()
+            table.AddMany(data)
+        # end for table
+
+        db.Close()
+
+        # startup on a full file reads and checks the schema
+        results['Database open (sync)'] = Measure(lambda n: Database(ini).Close(), 5, 0)
+
+        db = Database(ini)
+        person = db.GetTable(ftable)
+        columns = list(person._columns.keys())
+        size = sizes[person.TableName]
+
+        results[f'{ftable}.GetAll'] = Measure(lambda n: len(person.GetAll()), 5, 0)
+        results[f'{ftable}.Get (1 column)'] = Measure(lambda n: len(person.Get(columns[1:2])), 5, 0)
+
+        values = [r[0] for r in person.Get([fcol])]
+
+        def filtered(n):
+            person.ClearFilters()
+            person.Filter(fcol, ComparisonOps.EQUALS, rng.choice(values))
+            return len(person.GetAll())
+        results[f'{ftable}.Get (filtered)'] = Measure(filtered, calls, 0)
+        person.ClearFilters()
+
+        new = Generate(person, calls + 1, rng)
+        results[f'{ftable}.Add'] = Measure(lambda n: person.Add(new[n]), calls, 1)
+
+        pk = person._pks[0]
+        update = columns[-1]
+        sample = person._columns[update].Default
+
+        def updateValue(n):
+            person.UpdateValue(update, sample, pk, ComparisonOps.EQUALS, rng.randint(1, size))
+        results[f'{ftable}.UpdateValue'] = Measure(updateValue, calls, 1)
+
+        # delete from the far end, so every call removes a row
+        results[f'{ftable}.Delete'] = Measure(lambda n: person.Delete(pk, ComparisonOps.EQUALS, size - n), calls, 1)
+
+        joined = JoinedTable(db.GetTable(ptable), db.GetTable(stable), pcol, scol)
+        jcols = list(joined._columns.keys())
+        results['JoinedTable.GetAll'] = Measure(lambda n: len(joined.GetAll()), 3, 0)
+
+        def joinFiltered(n):
+            joined.ClearFilters()
+            joined.Filter(f'{ftable}.{fcol}', ComparisonOps.EQUALS, rng.choice(values))
+            return len(joined.Get(jcols))
+        results['JoinedTable.Get (filtered)'] = Measure(joinFiltered, calls, 0)
+
+        db.Close()
+    # end with folder
+
+    return results
+
+# endregion
+
+
+# region Reporting
+
+def Meta(count: int, seed: int) -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ''
+
+    return {'commit': commit, 'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'rows': count, 'seed': seed,
+            'python': platform.python_version(), 'sqlite': sqlite3.sqlite_version, 'platform': platform.platform()}
+
+
+def Print(results: dict, baseline: dict = None):
+    """
+    Prints the results as a table, with the change from a baseline run if there is one.
+    """
+    print(f'{"operation":<30} {"calls":>7} {"rows/s":>12} {"p50 ms":>10} {"p99 ms":>10} {"peak KB":>10}'
+          + (f' {"p50 vs base":>12}' if baseline else ''))
+    for name, r in results.items():
+        line = f'{name:<30} {r["calls"]:>7} {r["rows_per_s"]:>12.0f} {r["p50_ms"]:>10.3f} {r["p99_ms"]:>10.3f} ' \
+               f'{r["peak_kb"]:>10.1f}'
+        if baseline:
+            old = baseline.get(name)
+            if old and old['p50_ms']:
+                line += f' {(r["p50_ms"] / old["p50_ms"] - 1) * 100:>+11.1f}%'
+        print(line)
+
+# endregion
+
+
+if __name__ == '__main__':
+    here = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description='Times the LiteDAO operations against a synthetic database.')
+    parser.add_argument('--rows', type=int, default=100000, help='rows in a table with a fraction of 1')
+    parser.add_argument('--calls', type=int, default=500, help='calls timed for the single row operations')
+    parser.add_argument('--schema', default=os.path.join(here, 'schema.ini'), help='the ini schema to build')
+    parser.add_argument('--seed', type=int, default=1, help='seed for the generated data')
+    parser.add_argument('--out', default='bench_results.json', help='where to write the json results')
+    parser.add_argument('--compare', help='json results from an earlier run to compare with')
+    args = parser.parse_args()
+
+    results = Run(args.schema, args.rows, args.calls, args.seed)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+
+    Print(results, baseline)
+
+    with open(args.out, 'w') as f:
+        json.dump({'meta': Meta(args.rows, args.seed), 'results': results}, f, indent=2)
+    print(f'results written to {args.out}', file=sys.stderr)
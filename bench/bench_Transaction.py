@@ -0,0 +1,46 @@
+import sys
+import tempfile
+
+from Common import *
+from Database import Database
+from Definitions import ComparisonOps
+
+"""
+Runs a mix of Add and UpdateValue calls with each call committing on its own, then again inside a single
+Database.Transaction block.
+
+    python bench_Transaction.py [operations]
+"""
+
+
+def mixed(person, count: int):
+    for i in range(count):
+        if i % 2:
+            person.UpdateValue('age', i % 90, 'fname', ComparisonOps.EQUALS, f'first{i - 1}')
+        else:
+            person.Add(Person(i))
+
+
+def run(count: int):
+    for name in ['per-call commits', 'one transaction']:
+        with tempfile.TemporaryDirectory() as folder:
+            ini = os.path.join(folder, 'bench.ini')
+            with open(ini, 'w') as f:
+                f.write(f'[global]\nfile = {os.path.join(folder, "bench.db")}\n{PERSON_INI}')
+
+            db = Database(ini)
+            person = db.GetTable('Person')
+
+            def work():
+                if name == 'one transaction':
+                    with db.Transaction():
+                        mixed(person, count)
+                else:
+                    mixed(person, count)
+
+            Report(f'Add/UpdateValue ({name})', count, Timed(work))
+            db.Close()
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,47 @@
+import sys
+import time
+
+from Columns import Column
+
+"""
+Measures validations per second for each kind of column validator, one value at a time with Validate and a whole
+column at once with ValidateMany.
+
+    python bench_Validators.py [values]
+"""
+
+CASES = [
+    ('integer', 'integer', lambda i: i),
+    ('real', 'real', lambda i: i * 0.5),
+    ('text', 'text', lambda i: f'value{i}'),
+    ('regex', r'text (regex: ^[0-9]{3}-[0-9]{4}$)', lambda i: f'{i % 1000:03}-{i % 10000:04}'),
+    ('math', 'real (math: x >= 0 and x < 1e12)', lambda i: i * 0.5),
+    ('custom', 'text', lambda i: f'J{i}'),
+]
+
+
+def rate(func, values) -> float:
+    start = time.perf_counter()
+    func(values)
+    return len(values) / (time.perf_counter() - start)
+
+
+def run(count: int):
+    print(f'{"validator":<10} {"Validate/s":>14} {"ValidateMany/s":>16}')
+    for name, props, make in CASES:
+        col = Column(name, props)
+        if name == 'custom':
+            col.Set_Validator(lambda v: v.startswith('J'))
+
+        values = [make(i) for i in range(count)]
+
+        def single(vals):
+            # collect the failures too, so both sides do the same work
+            check = col.Validate
+            return [i for i, v in enumerate(vals) if not check(v)]
+
+        print(f'{name:<10} {rate(single, values):>14.0f} {rate(col.ValidateMany, values):>16.0f}')
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 500000)
@@ -0,0 +1,151 @@
+import asyncio
+import functools
+import itertools
+import typing
+from concurrent.futures import ThreadPoolExecutor
+
+from Tables import Table
+from Definitions import *
+
+
+class AsyncTable:
+    """
+    Wraps a Table (or JoinedTable) so it can be used from asyncio without blocking the event loop.  All the work is
+    still done by the wrapped table, but on a single worker thread which checks a connection out of the table's pool
+    for each operation and hands it back when the operation is done.  Since there is only one worker the operations
+    run in the order they were awaited.
+
+    The filters start as a copy of the wrapped table's, and from then on are separate - filtering here doesn't change
+    what the wrapped table reads, or the other way around.
+
+    The table needs to come from a Database (or have a ConnectionPool), a bare connection can only be used by the
+    thread which opened it.  Like any asyncio primitive, an instance belongs to the event loop which first uses it.
+    """
+
+    def __init__(self, table: Table, max_pending: int = 64):
+        """
+        Constructor
+        :param table: The table to run the operations on.
+        :param max_pending: How many operations can be waiting on the worker before callers have to wait their turn.
+        """
+        self._table = table
+        self._view = table._fork()  # the operations run on this, with its own filters
+        self._pending = asyncio.Semaphore(max_pending)
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'AsyncTable-{table.TableName}')
+        self._closed = False
+
+    # region Worker
+
+    def _call(self, func: typing.Callable, *args, **kwargs) -> typing.Any:
+        # runs on the worker thread - the nested checkouts the table makes all get this connection, and it goes back to
+        # the pool as soon as the operation is done (a stream keeps its own until it's finished)
+        with self._view.Pool.Checkout():
+            return func(*args, **kwargs)
+
+    async def _run(self, func: typing.Callable, *args, **kwargs) -> typing.Any:
+        """
+        Queues a call on the worker thread and waits for the result.
+        """
+        async with self._pending:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._worker, functools.partial(self._call, func, *args, **kwargs))
+
+    # endregion
+
+    @property
+    def Table(self) -> Table:
+        return self._table
+
+    # region DB Interactions
+
+    async def GetAll(self) -> list:
+        """
+        Performs a get for all the columns in the table.  Any filters set still apply to the results.
+        """
+        return await self._run(self._view.GetAll)
+
+    async def Get(self, columns: list) -> list:
+        """
+        Retrieves all values of a set of columns, see Table.Get.
+        """
+        return await self._run(self._view.Get, columns)
+
+    async def Iter(self, columns: list, chunk_size: int = 1000) -> typing.AsyncIterator:
+        """
+        Streams the values of a set of columns, fetching chunk_size rows per trip to the worker thread.
+        :param columns: A list of the column names to select.
+        :param chunk_size: The number of rows to read from the database at a time.
+        """
+        rows = await self._run(self._view.Iter, columns, chunk_size)
+        try:
+            while True:
+                chunk = await self._run(lambda: list(itertools.islice(rows, chunk_size)))
+                if not chunk:
+                    break
+                for r in chunk:
+                    yield r
+        finally:
+            # the generator holds the cursor, it has to be closed on the thread that made it - once the worker is gone
+            # that's left to the garbage collector
+            if not self._closed:
+                await self._run(rows.close)
+
+    def IterAll(self, chunk_size: int = 1000) -> typing.AsyncIterator:
+        """
+        Streams all the columns in the table.  Any filters set still apply to the results.
+        """
+        return self.Iter(list(self._view._columns.keys()), chunk_size)
+
+    async def Add(self, values: dict):
+        """
+        Adds a new entry to the table, see Table.Add.
+        """
+        await self._run(self._view.Add, values)
+
+    async def AddMany(self, rows: typing.Iterable, columns: list = None, batch_size: int = 1000) -> int:
+        """
+        Adds a set of new entries to the table, see Table.AddMany.
+        """
+        return await self._run(self._view.AddMany, rows, columns, batch_size)
+
+    async def UpdateValue(self, name: str, value: typing.Any, compname: str = '',
+                          operator: ComparisonOps = ComparisonOps.Noop, compval: typing.Any = None):
+        """
+        Update a single column on all rows matching the condition, see Table.UpdateValue.
+        """
+        await self._run(self._view.UpdateValue, name, value, compname, operator, compval)
+
+    async def Delete(self, name: str = None, operator: ComparisonOps = ComparisonOps.Noop, value: typing.Any = None):
+        """
+        Delete all entries matching the condition, see Table.Delete.
+        """
+        await self._run(self._view.Delete, name, operator, value)
+
+    # endregion
+
+    # region Infrastructure
+
+    # the queued operations read the filters, so changes to them wait their turn on the worker too
+
+    async def Filter(self, name: typing.Union[str, Where, And, Not], operator: ComparisonOps = ComparisonOps.Noop,
+                     value: typing.Any = None):
+        """
+        Adds a filter, or a whole filter expression, for the operations made through this wrapper, see Table.Filter.
+        """
+        await self._run(self._view.Filter, name, operator, value)
+
+    async def ClearFilters(self):
+        """
+        Removes all the filters set through this wrapper.
+        """
+        await self._run(self._view.ClearFilters)
+
+    async def Close(self):
+        """
+        Stops the worker, once the operations already queued are done.  The wait for them is made off the event loop.
+        """
+        self._closed = True
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, functools.partial(self._worker.shutdown, wait=True))
+
+    # endregion
@@ -1,7 +1,54 @@
+import ast
 import re
 import typing
 import fnmatch
-from sqlparse import tokens as Token
+import itertools
+
+
+# the only pieces of python allowed in a 'math:' validator
+_MATH_NODES = (ast.Expression, ast.Compare, ast.BoolOp, ast.UnaryOp, ast.BinOp, ast.Constant, ast.Name, ast.Load,
+               ast.Call, ast.And, ast.Or, ast.Not, ast.USub, ast.UAdd, ast.Add, ast.Sub, ast.Mult, ast.Div,
+               ast.FloorDiv, ast.Mod, ast.Pow, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE)
+_MATH_FUNCS = {'abs': abs, 'min': min, 'max': max, 'round': round}
+
+
+def _compileMath(expr: str) -> typing.Callable[[typing.Any], bool]:
+    """
+    Turns a 'math:' validator expression over x (ie - 'x >= 0 and x % 2 == 0') into a function.  The expression is
+    checked against a short list of allowed operations, so it can only do arithmetic and comparisons on x.
+    :param expr: The expression.
+    :return: A function of x which returns True when the expression holds.  Values the expression can't be applied to
+    (ie - text) fail, None passes like in the type checks.
+    """
+    tree = ast.parse(expr.strip(), mode='eval')
+
+    for node in ast.walk(tree):
+        if not isinstance(node, _MATH_NODES):
+            raise ValueError(f"'{expr.strip()}': {type(node).__name__} is not allowed in a math validator")
+        if isinstance(node, ast.Name) and node.id != 'x' and node.id not in _MATH_FUNCS:
+            raise ValueError(f"'{expr.strip()}': unknown name {node.id}")
+        if isinstance(node, ast.Call) and (not isinstance(node.func, ast.Name) or node.func.id not in _MATH_FUNCS):
+            raise ValueError(f"'{expr.strip()}': only {', '.join(_MATH_FUNCS.keys())} can be called")
+        if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float)):
+            raise ValueError(f"'{expr.strip()}': only numbers can be used")
+    # end for node
+
+    # wrap the expression in a lambda so it's compiled once and then called like any other function
+    func = ast.Expression(ast.Lambda(args=ast.arguments(posonlyargs=[], args=[ast.arg(arg='x')], kwonlyargs=[],
+                                                         kw_defaults=[], defaults=[]),
+                                     body=tree.body))
+    pred = eval(compile(ast.fix_missing_locations(func), '<math validator>', 'eval'),
+                {'__builtins__': {}, **_MATH_FUNCS})
+
+    def check(x: typing.Any) -> bool:
+        if x is None:
+            return True
+        try:
+            return bool(pred(x))
+        except TypeError:
+            return False
+
+    return check
 
 
 # TODO add support for unique/check/collate/generated constraints
@@ -12,6 +59,9 @@ class Column:
     returns True if the value is good.  This defaults to a simple type check.
     """
 
+    # the python types the built in validators check for, used by ValidateMany
+    __VECTOR_TYPES = {'integer': int, 'real': float, 'text': str}
+
     # region Properties
     @property
     def Name(self):
@@ -61,22 +111,20 @@ class Column:
         """
         self._name = name
 
-        # pull off the validation function
+        # pull off the validation function - the last ) closes it, regexes can have their own
         oparan = props.find('(')
-        cparan = props.find(')', oparan)
+        cparan = props.rfind(')')
 
         self._valid = True
 
+        # what kind of validator is in use, lets ValidateMany pick a faster way to check a whole column
+        self._vkind = None
+        self._pattern = None
+
         if oparan > 0:
             parts = props[:oparan].split(',')
 
-            vdator = props[oparan:cparan]
-            tech, func = vdator.split(':')
-            if tech.strip(' ').lower() == 'regex':
-                self._validator = lambda x: re.search(func.strip(), x) != None
-            elif tech.strip(' ').lower() == 'math':
-                func[0] = 'x'
-                self._validator = lambda x: func.strip(' ')
+            self.Build_Validator(props[oparan + 1:cparan])
         else:
             parts = props.split(',')
             # TODO convert to new match and correct for actually allowed column types, not just underlying datatypes
@@ -88,6 +136,7 @@ class Column:
                 'blob': (lambda val: True)  # just let it ride
             }
             self._validator = vdators[parts[0].strip()]
+            self._vkind = parts[0].strip()
 
         # object field defaults
         self._ct = parts[0].strip()  # column type will always be there
@@ -197,24 +246,63 @@ class Column:
         """
         return self._validator(value)
 
+    def ValidateMany(self, values: typing.Sequence) -> list:
+        """
+        Checks a whole set of values for this column at once.  The built in type checks and regex validators are run
+        without a function call per value, anything else falls back to calling the validator for each one.
+        :param values: The candidates to validate.
+        :return: The positions of the values which failed, empty if they are all good.
+        """
+        kind = self._vkind
+
+        if kind in self.__VECTOR_TYPES:
+            vtype = self.__VECTOR_TYPES[kind]
+            # the common case is a clean column, which map can confirm without running any python per value
+            if all(map(isinstance, values, itertools.repeat(vtype))):
+                return []
+            return [i for i, v in enumerate(values) if v is not None and not isinstance(v, vtype)]
+        elif kind == 'null':
+            return [i for i, v in enumerate(values) if v is not None]
+        elif kind == 'blob':
+            return []
+        elif kind == 'regex':
+            search = self._pattern.search
+            try:
+                if all(map(search, values)):
+                    return []
+            except TypeError:
+                pass  # something other than text in there, the long way will find it
+            return [i for i, v in enumerate(values) if v is not None and (not isinstance(v, str) or search(v) is None)]
+
+        check = self._validator
+        return [i for i, v in enumerate(values) if not check(v)]
+
     def Set_Validator(self, vdator: type(len)):
         """
         Changes the validation function for a column.
         :param vdator: The new validator function.
         """
         self._validator = vdator
+        self._vkind = None
 
     def Build_Validator(self, vdator: str):
         """
-        Changes the validator for the column based on a lambda expression from the vdator.
-        :param vdator: A string describing the new validator.
+        Changes the validator for the column based on a lambda expression from the vdator.  The expression is
+        compiled here, once, rather than each time a value is checked.
+        :param vdator: A string describing the new validator, either 'regex: <pattern>' or 'math: <expression of x>'.
         """
-        tech, func = vdator.split(':')
-        if tech.strip(' ').lower() == 'regex':
-            self._validator = lambda x: re.search(func.strip(), x) != None
-        elif tech.strip(' ').lower() == 'math':
-            func[0] = 'x'
-            self._validator = lambda x: func.strip(' ')
+        tech, func = vdator.split(':', 1)
+        tech = tech.strip(' ').lower()
+        if tech == 'regex':
+            pattern = re.compile(func.strip())
+            self._validator = lambda x: x is None or isinstance(x, str) and pattern.search(x) is not None
+            self._vkind = 'regex'
+            self._pattern = pattern
+        elif tech == 'math':
+            self._validator = _compileMath(func)
+            self._vkind = 'math'
+        else:
+            raise ValueError(f"{self._name}: Unknown validator type '{tech}'")
 
     # TODO replace this with getattr
     def ReadAttribute(self, attr: str) -> typing.Any:
@@ -243,6 +331,8 @@ class Column:
             clause = f'{clause} Primary Key'
         if not self.Nullable and not self.PrimaryKey:  # pk's are inherently not null
             clause = f'{clause} Not Null'
+        if self.Unique and not self.PrimaryKey:  # so are they unique
+            clause = f'{clause} Unique'
 
         # return the SQL
         return clause
@@ -0,0 +1,286 @@
+import contextlib
+import itertools
+import queue
+import re
+import sqlite3
+import threading
+import typing
+import weakref
+
+from Errors import *
+
+
+class _Owned:
+    """
+    A connection which belongs to one thread, kept in that thread's locals.  When the thread finishes its locals are
+    dropped, and the connection is closed with them instead of staying open until the pool is closed.
+    """
+
+    __slots__ = ('Conn', '__weakref__')
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.Conn = conn
+
+    def __del__(self):
+        self.Close()
+
+    def Close(self):
+        try:
+            self.Conn.close()
+        except sqlite3.ProgrammingError:
+            # another thread's, dropping the last reference when that thread finishes closes it
+            pass
+
+
+class ConnectionPool:
+    """
+    Hands out connections to a single database file.  A thread checks a connection out for the length of a with block
+    and returns it at the end, nested checkouts in the same thread get the same connection back.
+
+    When check_same_thread is True every thread keeps its own connection (sqlite will not allow them to move), and the
+    size only limits how many threads can hold one at the same time.  When it is False the idle connections are shared
+    between all the threads and at most size of them are ever opened.
+    """
+
+    # pragma names and values can't be passed as parameters, so they are limited to simple words and numbers
+    __PRAGMA_NAME = re.compile(r'^[A-Za-z_]+$')
+    __PRAGMA_VALUE = re.compile(r'^-?[A-Za-z0-9_]+$')
+
+    def __init__(self, path: str, size: int = 5, check_same_thread: bool = False, timeout: float = 5.0,
+                 pragmas: dict = None):
+        """
+        Constructor - no connections are opened until they're needed.
+        :param path: Location of the database file.
+        :param size: Maximum number of connections checked out at the same time.
+        :param check_same_thread: Passed on to sqlite3.connect, also selects how the connections are shared.
+        :param timeout: How long to wait for a free connection before raising PoolExhausted.
+        :param pragmas: Map of pragma names and values to set on every new connection (ie - journal_mode: WAL).
+        """
+        self._path = path
+        self._size = size
+        self._sameThread = check_same_thread
+        self._timeout = timeout
+
+        self._pragmas = {}
+        for name, value in (pragmas or {}).items():
+            if not self.__PRAGMA_NAME.match(name) or not self.__PRAGMA_VALUE.match(str(value)):
+                raise ValueError(f"Invalid pragma '{name} = {value}'")
+            self._pragmas[name.lower()] = str(value)
+
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = queue.LifoQueue()  # most recently used first, keeps the page cache warm
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._opened = []  # every shared connection made, so they can all be closed
+        self._owned = weakref.WeakSet()  # the _Owned holders of the per thread connections still alive
+
+        # moves on whenever a transaction ends, so anything cached from a read can tell it might be out of date
+        self._ends = itertools.count(1)
+        self._generation = 0
+
+    # region Properties
+
+    @property
+    def Path(self) -> str:
+        return self._path
+
+    @property
+    def Size(self) -> int:
+        return self._size
+
+    @property
+    def CheckSameThread(self) -> bool:
+        return self._sameThread
+
+    @property
+    def Opened(self) -> int:
+        return len(self._opened) + len(self._owned)
+
+    @property
+    def Pragmas(self) -> dict:
+        return dict(self._pragmas)
+
+    @property
+    def InTransaction(self) -> bool:
+        return getattr(self._local, 'txn', 0) > 0
+
+    @property
+    def Generation(self) -> int:
+        """
+        Changes every time a Transaction block commits or rolls back, on any thread.
+        """
+        return self._generation
+
+    # endregion
+
+    @contextlib.contextmanager
+    def Checkout(self) -> typing.Iterator[sqlite3.Connection]:
+        """
+        Context manager which checks a connection out of the pool, and back in once the block exits.
+        :return: The connection for this thread.
+        """
+        local = self._local
+        if getattr(local, 'depth', 0) == 0:
+            local.conn = self._acquire()
+            local.depth = 0
+        local.depth += 1
+
+        try:
+            yield local.conn
+        finally:
+            local.depth -= 1
+            # only the outermost checkout gives the connection back
+            if local.depth == 0:
+                conn = local.conn
+                local.conn = None
+                self._release(conn)
+
+    @contextlib.contextmanager
+    def Transaction(self) -> typing.Iterator[sqlite3.Connection]:
+        """
+        Context manager which keeps this thread's connection checked out and inside one transaction until the block
+        exits.  Commit does nothing while a transaction is open, the work is committed at the end of the outermost
+        block or rolled back if the block raises.  Nested blocks use savepoints, so an inner block can fail and roll
+        back on its own.
+        :return: The connection for this thread.
+        """
+        with self.Checkout() as conn:
+            local = self._local
+            depth = getattr(local, 'txn', 0)
+
+            if depth == 0:
+                conn.execute('begin')
+            else:
+                conn.execute(f'savepoint litedao_{depth}')
+            local.txn = depth + 1
+
+            try:
+                yield conn
+            except BaseException:
+                local.txn = depth
+                if depth == 0:
+                    conn.rollback()
+                    self._generation = next(self._ends)
+                else:
+                    conn.execute(f'rollback to litedao_{depth}')
+                    conn.execute(f'release litedao_{depth}')
+                raise
+            else:
+                local.txn = depth
+                if depth == 0:
+                    conn.commit()
+                    self._generation = next(self._ends)
+                else:
+                    conn.execute(f'release litedao_{depth}')
+        # end with checkout
+
+    def Commit(self, conn: sqlite3.Connection):
+        """
+        Commits the work done on a connection, unless this thread is inside a Transaction block.
+        :param conn: The connection checked out from this pool.
+        """
+        if getattr(self._local, 'txn', 0) == 0:
+            conn.commit()
+
+    def ReadPragmas(self, names: typing.Iterable = None) -> dict:
+        """
+        Reads the values sqlite is actually using for a set of pragmas.
+        :param names: The pragmas to read, defaults to the ones the pool sets.
+        :return: Map of the pragma names to their current values.
+        """
+        names = self._pragmas.keys() if names is None else names
+        values = {}
+        with self.Checkout() as conn:
+            for name in names:
+                if not self.__PRAGMA_NAME.match(name):
+                    raise ValueError(f"Invalid pragma '{name}'")
+                row = conn.execute(f'pragma {name}').fetchone()
+                values[name] = row[0] if row is not None else None
+        return values
+
+    def Close(self):
+        """
+        Closes every connection the pool opened.  Connections still checked out are closed too, so only call this once
+        the work is done.  With check_same_thread only the connections owned by the calling thread can be closed, the
+        others are closed as their threads finish.
+        """
+        with self._lock:
+            for conn in self._opened:
+                conn.close()
+            self._opened.clear()
+
+            for owned in list(self._owned):
+                owned.Close()
+
+        # drain the idle list, they're all closed now
+        while not self._idle.empty():
+            self._idle.get_nowait()
+
+    # region Helpers
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Opens a new connection to the database.
+        """
+        conn = sqlite3.connect(self._path, check_same_thread=self._sameThread)
+
+        # apply the tuning - some (journal_mode) answer with the new value, so read it to finish the statement
+        for name, value in self._pragmas.items():
+            conn.execute(f'pragma {name} = {value}').fetchall()
+
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        if not self._slots.acquire(timeout=self._timeout):
+            raise PoolExhausted(self._path, self._size)
+
+        try:
+            if self._sameThread:
+                # each thread owns its connection for its whole life
+                owned = getattr(self._local, 'owned', None)
+                if owned is None:
+                    owned = _Owned(self._connect())
+                    self._local.owned = owned
+                    with self._lock:
+                        self._owned.add(owned)
+                return owned.Conn
+
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+                with self._lock:
+                    self._opened.append(conn)
+                return conn
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, conn: sqlite3.Connection):
+        if not self._sameThread:
+            self._idle.put(conn)
+        self._slots.release()
+
+    # endregion
+
+
+class SingleConnection(ConnectionPool):
+    """
+    Wraps a connection opened by the caller so it can be used anywhere a pool is expected.  The caller still owns the
+    connection, so Close leaves it open.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        super().__init__('', size=1, check_same_thread=True)
+        self._conn = conn
+
+    def Close(self):
+        pass
+
+    def _acquire(self) -> sqlite3.Connection:
+        if not self._slots.acquire(timeout=self._timeout):
+            raise PoolExhausted(self._path, self._size)
+        return self._conn
+
+    def _release(self, conn: sqlite3.Connection):
+        self._slots.release()
@@ -1,13 +1,27 @@
 import configparser
+import contextlib
 import os
 from Tables import *
-from sqlparse import engine, tokens as Token
+from Connections import ConnectionPool
 
 """
 
 """
 
 
+def _hasTablePragmas() -> bool:
+    # the pragmas can be joined in a select (ie - pragma_table_info(name)) from sqlite 3.16
+    with contextlib.closing(sqlite3.connect(':memory:')) as conn:
+        try:
+            conn.execute("Select name From pragma_table_info('sqlite_master')").fetchall()
+            return True
+        except sqlite3.OperationalError:
+            return False
+
+
+_TABLE_PRAGMAS = _hasTablePragmas()
+
+
 class Database:
     """
     Manages the ini file and initiates the processing on load.  Since the ini
@@ -28,17 +42,42 @@ class Database:
         self.DatabasePath = config['global']['File']
         file_existed = os.path.isfile(self.DatabasePath)
 
-        # creates the file if it isn't present
-        self._client = sqlite3.connect(self.DatabasePath)
+        # connection tuning is listed in the global section as 'pragma.<name> = <value>'
+        pragmas = {k[len('pragma.'):]: v for k, v in config['global'].items() if k.startswith('pragma.')}
+
+        # every table shares the connections from the pool - the first checkout creates the file if it isn't present
+        self._pool = ConnectionPool(self.DatabasePath,
+                                    size=config['global'].getint('PoolSize', 5),
+                                    check_same_thread=config['global'].getboolean('CheckSameThread', False),
+                                    timeout=config['global'].getfloat('PoolTimeout', 5.0),
+                                    pragmas=pragmas)
+
+        # tables found in the file which don't match the ini file
+        self.OutOfSync = []
+        # indexes found in the file which don't match the ini file
+        self.IndexDrift = []
+        indexes = {}
 
         # prep for the comparison
         if file_existed:
-            # read all the sql creates from the metadata
-            sqlstmts = self._client.execute("select sql from sqlite_master where type = 'table'").fetchall()
+            if _TABLE_PRAGMAS:
+                # sqlite already has the columns worked out, ask it instead of parsing the creates
+                with self._pool.Checkout() as conn:
+                    tokens = self._readSchema(conn)
+            else:
+                # read all the sql creates from the metadata
+                with self._pool.Checkout() as conn:
+                    sqlstmts = conn.execute("select sql from sqlite_master where type = 'table'").fetchall()
+
+                for sql in sqlstmts:
+                    tname, tdata = self._parse_create(sql[0])
+                    tokens[tname] = tdata
 
-            for sql in sqlstmts:
-                tname, tdata = self._parse_create(sql[0])
-                tokens[tname] = tdata
+            # the automatic indexes (pk, unique) have no sql and aren't declared in the ini file
+            with self._pool.Checkout() as conn:
+                for name, tname, sql in conn.execute("select name, tbl_name, sql from sqlite_master "
+                                                     "where type = 'index' and sql is not null"):
+                    indexes.setdefault(tname.lower(), {})[name] = sql
 
         # this will make the system attempt to run some alter scripts to correct
         # differences between the found and spec'd DB
@@ -54,24 +93,121 @@ class Database:
                 continue
 
             # create new table - pass in None instead of the tokens dict for the table if not found in db
-            ntable = Table(table, self._client, tokens[table] if table in tokens.keys() else {})
+            ntable = Table(config[table], self._pool, tokens[table] if table in tokens.keys() else {})
             self.tables.append(ntable)
 
-            if file_existed:
-                #get the list of differences
-                if not ntable.IsValid:
-                    ntable.Sync()
+            if table not in tokens.keys():
+                # empty db or a new table in the ini file, need to create the table
+                ntable.Create()
             else:
-                # empty db, need to create the table
-                Table.Create()
+                # TODO alter the table to match the ini file when updating, for now just track the differences
+                drift = ntable.SyncIndexes(indexes.get(table.lower(), {}))
+                self.IndexDrift.extend(drift)
+
+                if not ntable.IsValid or len(drift) > 0:
+                    self.OutOfSync.append(table)
         # end for table in config.sections
     # end __init__()
 
+    @contextlib.contextmanager
+    def Connection(self) -> typing.Iterator[sqlite3.Connection]:
+        """
+        Checks a connection out of the pool for the length of a with block.
+        :return: The connection for this thread.
+        """
+        with self._pool.Checkout() as conn:
+            yield conn
+
+    def Transaction(self) -> typing.ContextManager[sqlite3.Connection]:
+        """
+        Groups all the table operations inside a with block into a single transaction.  None of the operations commit
+        on their own, everything is committed when the block exits, or rolled back if it raises.  Nested blocks become
+        savepoints.
+        """
+        return self._pool.Transaction()
+
+    def Close(self):
+        """
+        Closes all the connections to the database.
+        """
+        self._pool.Close()
+
+    @property
+    def Pool(self) -> ConnectionPool:
+        return self._pool
+
+    @property
+    def Pragmas(self) -> dict:
+        """
+        The values sqlite reports for the pragmas set in the ini file, which may differ from what was asked for (ie -
+        journal_mode stays 'memory' for an in-memory database).
+        """
+        return self._pool.ReadPragmas()
+
+    def GetTable(self, name: str) -> Table:
+        """
+        Finds one of the tables loaded from the ini file.
+        :param name: The name of the table (case-insensitive, like sqlite).
+        :return: The table object, or None if there is no such table.
+        """
+        for t in self.tables:
+            if t.TableName.lower() == name.lower():
+                return t
+        return None
+
+    def _readSchema(self, conn: sqlite3.Connection) -> dict:
+        """
+        Reads the columns of every table from the pragmas (table_info, index_list, foreign_key_list) in three queries,
+        whatever the number of tables.  The per column data is the same as _parse_create makes from the create
+        statements: the type, followed by the 'default <value>', 'primarykey', 'not null', 'unique', and
+        'foreignkey <table>.<column>' properties the column has.
+        :param conn: The connection to read with.
+        :return: Map of the table names to the maps of their column names and data.
+        """
+        tables = {}
+        extra = {}  # (table, column) -> the unique and foreign key properties
+
+        # only the single column constraints belong to a column, the others are on the table
+        for tname, cname in conn.execute(
+                "Select m.name, ii.name From sqlite_master m Join pragma_index_list(m.name) il "
+                "Join pragma_index_info(il.name) ii Where m.type = 'table' and il.origin = 'u' "
+                "Group By m.name, il.name Having count(*) = 1"):
+            extra.setdefault((tname, cname), []).append('unique')
+
+        for tname, cname, ftable, fcol in conn.execute(
+                "Select m.name, fk.\"from\", fk.\"table\", fk.\"to\" From sqlite_master m "
+                "Join pragma_foreign_key_list(m.name) fk Where m.type = 'table' "
+                "Group By m.name, fk.id Having count(*) = 1"):
+            extra.setdefault((tname, cname), []).append(f"foreignkey {ftable}.{fcol or ''}")
+
+        for tname, cname, ctype, notnull, default, pk in conn.execute(
+                "Select m.name, p.name, p.type, p.\"notnull\", p.dflt_value, p.pk From sqlite_master m "
+                "Join pragma_table_info(m.name) p Where m.type = 'table' and m.name not like 'sqlite\\_%' escape '\\' "
+                "Order By m.name, p.cid"):
+            # sqlite hands back the types in upper case, the ini files (and the creates made from them) use lower
+            cdata = [ctype.lower()] if ctype else []
+            if default is not None:
+                cdata.append('default ' + default.strip('\'').strip('"'))
+            if pk:
+                cdata.append('primarykey')
+            if notnull:
+                cdata.append('not null')
+            cdata.extend(extra.get((tname, cname), []))
+
+            tables.setdefault(tname, {})[cname] = cdata
+        # end for column
+
+        return tables
+    # end _readSchema()
+
     def _parse_create(self, sql: str):
         """
         Converts a create statement into a data structure (format still TBD)
         :return: A tuple of the table name and the data structure.
         """
+        # only needed when the pragmas can't be used, and slow to import
+        from sqlparse import engine, tokens as Token
+
         tdata = {}
         stack = engine.FilterStack()
         # returns a generator to the list of tokens
@@ -105,6 +241,11 @@ class Database:
 
                     # handle the special cases
                     if toks[i].is_keyword:
+                        # the column checks expect lower case, and sqlparse may hand back multi-word keywords
+                        # (ie - 'Not  Null') as one token
+                        tok_text = ' '.join(tok_text.lower().split())
+                        if tok_text == 'primary key':
+                            tok_text = "primarykey"
                         if tok_text.lower() == 'primary':
                             if toks[i + 1].value.lower() == 'key':
                                 tok_text = "primarykey"
@@ -156,7 +297,7 @@ class Database:
 
 
 
-    def _validateTable(self, name: str, table: Table, config: configparser.Section) -> tuple(bool, list):
+    def _validateTable(self, name: str, table: Table, config: configparser.SectionProxy) -> (bool, list):
         """
         Compare the SQL create statement generated from the ini file with the one from
         the Table object and determines any differences.
@@ -203,7 +344,7 @@ class Database:
             print(f"Tables not in ini file: {' '.join([t for t in dbts])}")
         return False, []
 
-    def _makeSQL(self, cfg: configparser.Section) -> str:
+    def _makeSQL(self, cfg: configparser.SectionProxy) -> str:
         """
         Makes a sql statment for a table from the ini config file section
         :param table:
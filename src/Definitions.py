@@ -16,6 +16,7 @@ class ComparisonOps(IntEnum):
     LIKE = 7
     IN = 8
     IS = 9
+    BETWEEN = 10
 
     def AsStr(self):
         strs = {
@@ -27,7 +28,8 @@ class ComparisonOps(IntEnum):
             ComparisonOps.LSorEQ: '<=',
             ComparisonOps.LIKE: 'like',
             ComparisonOps.IN: 'in',
-            ComparisonOps.IS: 'is'
+            ComparisonOps.IS: 'is',
+            ComparisonOps.BETWEEN: 'between'
         }
         return strs[self.value]
 
@@ -39,3 +41,44 @@ class Where:
     value: str
 
 
+class And:
+    """
+    Filter expression which matches the rows matching all of its clauses.  The clauses can be Where entries or other
+    expressions, ie - And(Where('lname', ComparisonOps.EQUALS, 'Doe'), Or(...)).
+    """
+
+    Joiner = 'and'
+
+    def __init__(self, *clauses):
+        self.Clauses = list(clauses)
+
+    def __eq__(self, other: object) -> bool:
+        return type(self) == type(other) and self.Clauses == other.Clauses
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({", ".join(repr(c) for c in self.Clauses)})'
+
+
+class Or(And):
+    """
+    Filter expression which matches the rows matching any of its clauses.
+    """
+
+    Joiner = 'or'
+
+
+class Not:
+    """
+    Filter expression which matches the rows its clause doesn't.
+    """
+
+    def __init__(self, clause):
+        self.Clause = clause
+
+    def __eq__(self, other: object) -> bool:
+        return type(self) == type(other) and self.Clause == other.Clause
+
+    def __repr__(self) -> str:
+        return f'Not({self.Clause!r})'
+
+
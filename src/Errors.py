@@ -37,3 +37,20 @@ class InvalidColumnValue(BaseException):
     def __str__(self):
         return f'Validate function failed for {self.Table}.{self.ColumnName} with value "{self.Value}"'
 
+
+class PoolExhausted(BaseException):
+    """
+    Exception for when no connection frees up in the pool before the timeout.
+    """
+
+    def __init__(self, path, size):
+        """
+        Constructor
+        :param path:  The database file the pool connects to.
+        :param size:  The number of connections in the pool.
+        """
+        self.Path = path
+        self.Size = size
+
+    def __str__(self):
+        return f'All {self.Size} connections to {self.Path} are in use.'
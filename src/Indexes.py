@@ -0,0 +1,89 @@
+import re
+
+
+class Index:
+    """
+    Representation of an index on a table, read from the table's section of the ini file.  Each index is a line of the
+    form:
+
+        index.<name> = [unique] <column>[, <column>...] [where <condition>]
+
+    The columns are in the order the index is built with, and the where condition makes it a partial index.
+    """
+
+    # region Properties
+    @property
+    def Name(self) -> str:
+        return self._name
+
+    @property
+    def TableName(self) -> str:
+        return self._table
+
+    @property
+    def Columns(self) -> list:
+        return list(self._columns)
+
+    @property
+    def Unique(self) -> bool:
+        return self._unique
+
+    @property
+    def Where(self) -> str:
+        return self._where
+
+    @property
+    def IsPartial(self) -> bool:
+        return self._where is not None
+
+    # endregion
+
+    def __init__(self, name: str, table: str, props: str):
+        """
+        Convert a string from the ini file with the index description into an index object.
+        :param name: The name of the index (without the 'index.' prefix).
+        :param table: The name of the table the index is on.
+        :param props: The description of the index.
+        """
+        self._name = name
+        self._table = table
+        self._where = None
+
+        # split off the partial index condition
+        parts = re.split(r'\swhere\s', props, maxsplit=1, flags=re.IGNORECASE)
+        if len(parts) == 2:
+            self._where = parts[1].strip()
+
+        cols = parts[0].strip()
+        self._unique = cols.lower().startswith('unique ')
+        if self._unique:
+            cols = cols[len('unique '):]
+
+        self._columns = [c.strip() for c in cols.split(',') if c.strip() != '']
+        if len(self._columns) == 0:
+            raise ValueError(f"{name}: An index needs at least one column")
+
+    def Build_SQL(self) -> str:
+        """
+        Creates the SQL statement which creates this index.
+        :return: The SQL statement for the index represented by this object.
+        """
+        sql = f'Create {"Unique " if self._unique else ""}Index {self._name} on {self._table} ' \
+              f'({", ".join(self._columns)})'
+        if self._where is not None:
+            sql = f'{sql} Where {self._where}'
+        return sql
+
+    def Matches(self, sql: str) -> bool:
+        """
+        Compares this index with the create statement sqlite has saved for an index of the same name.
+        :param sql: The sql column from sqlite_master.
+        :return: True if the two describe the same index.
+        """
+        return self._normalize(sql) == self._normalize(self.Build_SQL())
+
+    @staticmethod
+    def _normalize(sql: str) -> str:
+        # case and spacing don't matter to sqlite, so they don't matter here either
+        sql = ' '.join(sql.lower().replace('if not exists', '').split())
+        return re.sub(r'\s*([(),])\s*', r'\1', sql).strip(';')
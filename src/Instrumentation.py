@@ -0,0 +1,205 @@
+import math
+import threading
+import time
+import typing
+from dataclasses import dataclass
+
+
+@dataclass()
+class Sample:
+    """
+    The measurements from a single call to one of the table operations.  The times are in seconds, and any phase the
+    operation doesn't have (ie - fetch for a delete) is left at 0.
+    """
+    table: str
+    operation: str
+    build: float = 0.0
+    execute: float = 0.0
+    fetch: float = 0.0
+    commit: float = 0.0
+    rows: int = 0
+
+    @property
+    def total(self) -> float:
+        return self.build + self.execute + self.fetch + self.commit
+
+
+class Histogram:
+    """
+    A log scale histogram of durations.  Bucket n holds the values between 2^(n-1) and 2^n microseconds, which keeps
+    the memory fixed no matter how many values are added while still giving percentiles to within a factor of two.
+    """
+
+    BUCKETS = 40  # 2^39 microseconds is about 6 days, plenty
+
+    def __init__(self):
+        self.Count = 0
+        self.Total = 0.0
+        self.Min = math.inf
+        self.Max = 0.0
+        self._buckets = [0] * self.BUCKETS
+
+    def Add(self, seconds: float):
+        """
+        Adds a duration to the histogram.
+        :param seconds: The duration to add.
+        """
+        self.Count += 1
+        self.Total += seconds
+        self.Min = min(self.Min, seconds)
+        self.Max = max(self.Max, seconds)
+
+        micros = seconds * 1e6
+        ndx = 0 if micros < 1 else min(math.ceil(math.log2(micros)), self.BUCKETS - 1)
+        self._buckets[ndx] += 1
+
+    @property
+    def Mean(self) -> float:
+        return self.Total / self.Count if self.Count else 0.0
+
+    def Percentile(self, pct: float) -> float:
+        """
+        Estimates a percentile from the buckets.
+        :param pct: The percentile to find, from 0 to 100.
+        :return: The upper edge of the bucket holding the percentile (in seconds), capped at the largest value seen.
+        """
+        if self.Count == 0:
+            return 0.0
+
+        target = max(1, math.ceil(self.Count * pct / 100))
+        seen = 0
+        for ndx, n in enumerate(self._buckets):
+            seen += n
+            if seen >= target:
+                return min((2 ** ndx) / 1e6, self.Max)
+        return self.Max
+
+    def Summary(self) -> dict:
+        """
+        The usual figures in a form that's easy to log or dump to json.
+        """
+        return {'count': self.Count, 'mean': self.Mean, 'min': self.Min if self.Count else 0.0, 'max': self.Max,
+                'p50': self.Percentile(50), 'p90': self.Percentile(90), 'p99': self.Percentile(99)}
+
+
+class Timer:
+    """
+    Measures the phases of one operation.  Each Mark closes the current phase and starts the next one.
+    """
+
+    def __init__(self, owner: 'Instrumentation', table: str, operation: str):
+        self._owner = owner
+        self._sample = Sample(table, operation)
+        self._last = time.perf_counter()
+
+    def Mark(self, phase: str):
+        """
+        Ends a phase, charging the time since the last mark to it.
+        :param phase: One of build, execute, fetch, or commit.
+        """
+        now = time.perf_counter()
+        setattr(self._sample, phase, getattr(self._sample, phase) + now - self._last)
+        self._last = now
+
+    def Done(self, rows: int):
+        """
+        Finishes the measurement and hands the sample to the instrumentation.
+        :param rows: The number of rows returned or changed.
+        """
+        self._sample.rows = rows
+        self._owner.Record(self._sample)
+
+
+class NullTimer:
+    """
+    Stand-in used when instrumentation is off, so the operations don't need to check.
+    """
+
+    def Mark(self, phase: str):
+        pass
+
+    def Done(self, rows: int):
+        pass
+
+
+NULL_TIMER = NullTimer()
+
+
+class Instrumentation:
+    """
+    Collects the samples from the tables it is attached to (see Table.Instrument) into histograms per table, operation
+    and phase.  Listeners get every sample as it's recorded, for exporting somewhere else.
+    """
+
+    PHASES = ['build', 'execute', 'fetch', 'commit', 'total']
+
+    def __init__(self, listener: typing.Callable[[Sample], None] = None):
+        """
+        Constructor
+        :param listener: Optional function called with each Sample.
+        """
+        self._lock = threading.Lock()
+        self._histograms = {}  # (table, operation, phase) -> Histogram
+        self._rows = {}  # (table, operation) -> total rows
+        self._listeners = [] if listener is None else [listener]
+
+    def Start(self, table: str, operation: str) -> Timer:
+        """
+        Starts measuring an operation.
+        :param table: Name of the table doing the work.
+        :param operation: The name of the operation (ie - Get).
+        :return: The timer to mark the phases on.
+        """
+        return Timer(self, table, operation)
+
+    def Record(self, sample: Sample):
+        """
+        Adds a sample to the histograms and passes it on to the listeners.
+        :param sample: The measurements from one call.
+        """
+        with self._lock:
+            for phase in self.PHASES:
+                key = (sample.table, sample.operation, phase)
+                if key not in self._histograms:
+                    self._histograms[key] = Histogram()
+                self._histograms[key].Add(getattr(sample, phase))
+
+            key = (sample.table, sample.operation)
+            self._rows[key] = self._rows.get(key, 0) + sample.rows
+
+        for listener in self._listeners:
+            listener(sample)
+
+    def AddListener(self, listener: typing.Callable[[Sample], None]):
+        """
+        Adds a function to call with every sample recorded.
+        """
+        self._listeners.append(listener)
+
+    def Histogram(self, table: str, operation: str, phase: str = 'total') -> Histogram:
+        """
+        Gets the histogram for one phase of one operation on one table.
+        :return: The histogram, or None if nothing has been recorded for it.
+        """
+        return self._histograms.get((table, operation, phase))
+
+    def Stats(self) -> dict:
+        """
+        Summarizes everything recorded so far.
+        :return: Map of (table, operation) to the call count, total rows, and a summary of each phase.
+        """
+        stats = {}
+        with self._lock:
+            for (table, operation, phase), hist in self._histograms.items():
+                entry = stats.setdefault((table, operation), {'calls': hist.Count,
+                                                              'rows': self._rows[(table, operation)]})
+                entry[phase] = hist.Summary()
+        return stats
+
+    def Reset(self):
+        """
+        Drops everything recorded so far.
+        """
+        with self._lock:
+            self._histograms.clear()
+            self._rows.clear()
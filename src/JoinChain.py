@@ -0,0 +1,211 @@
+import typing
+from collections.abc import Mapping
+
+from Tables import Table
+from Errors import *
+from Definitions import *
+
+
+class _ChainColumns(Mapping):
+    """
+    The columns of every table in a chain, by their qualified names (ie - Person.fname).  Nothing is copied, the names
+    are looked up in the member tables when they're asked for.
+    """
+
+    def __init__(self, tables: dict):
+        self._tables = tables
+
+    def __getitem__(self, key: str):
+        tname, _, col = key.partition('.')
+        table = self._tables.get(tname)
+        if table is None or col not in table._columns:
+            raise KeyError(key)
+        return table._columns[col]
+
+    def __iter__(self) -> typing.Iterator[str]:
+        for tname, table in self._tables.items():
+            for col in table._columns:
+                yield f'{tname}.{col}'
+
+    def __len__(self) -> int:
+        return sum(len(t._columns) for t in self._tables.values())
+
+
+class JoinChain(Table):
+    """
+    A chain of joins starting from a root table, ie - person -> address -> city, read with a single query.  Each link
+    joins a new table on a column of a table already in the chain, as either a left join (every row from the chain so
+    far is kept) or an inner join (only the rows with a match are kept).
+
+    The columns are named <table>.<column>.  Filters, ordering and aggregates also take names without a table, which are
+    looked for in the root table first and then in the others.  The from clause is built once per join, and a Get only
+    selects the columns asked for.  Like JoinedTable the writes (UpdateValue, UpdateMany, Delete) only change the root
+    table, new rows are added (or upserted) through the member tables.
+    """
+
+    @property
+    def TableName(self):
+        return '/'.join(self._tables.keys())
+
+    def __init__(self, root: Table):
+        """
+        Constructor
+        :param root: The table the chain starts from.
+        """
+        self._root = root
+        self._tables = {root.TableName: root}
+        self._from = root.TableName
+
+        # share the connections with the root
+        self._pool = root._pool
+
+        self._columns = _ChainColumns(self._tables)
+        self._pks = [f'{root.TableName}.{c}' for c in root._pks]
+        self._filters = []  # where clauses
+
+        self._initRuntime()
+
+        root._addWriteListener(self.ClearResultCache)
+    # end __init__()
+
+    def Join(self, other: Table, otherCol: str, myCol: str, inner: bool = False) -> 'JoinChain':
+        """
+        Adds a table to the end of the chain.
+
+        :param other: The table to join with.
+        :param otherCol: The name of the column from the other table to join on.
+        :param myCol: The column from a table already in the chain to match to otherCol.
+        :param inner: Only keep the rows which have a match in other, instead of a left join.
+        :return: This chain, so the joins can be strung together.
+        """
+        if other.TableName in self._tables:
+            raise ValueError(f'{self.TableName}: {other.TableName} is already in the chain')
+        if otherCol not in other._columns:
+            raise ImaginaryColumn(other.TableName, otherCol)
+        myCol = self._normalizeColumn(myCol)
+
+        self._tables[other.TableName] = other
+        self._from += f" {'Inner' if inner else 'Left'} Join {other.TableName} on {myCol} = " \
+                      f"{other.TableName}.{otherCol}"
+
+        # the selects built so far don't have the new table
+        self.ClearQueryCache()
+        self.ClearResultCache()
+
+        # a write to any table in the chain changes what it returns
+        other._addWriteListener(self.ClearResultCache)
+        return self
+
+    # region Writes
+
+    def Upsert(self, rows: typing.Iterable, conflict_columns: list, update_columns: list, columns: list = None,
+               batch_size: int = 1000) -> (int, int):
+        raise TypeError(f'{self.TableName}: add new rows through the member tables')
+
+    def UpdateValue(self, name: str, value: typing.Any, compname: str = '', operator: ComparisonOps = ComparisonOps.Noop
+                    , compval: typing.Any = None):
+        """
+        Update a single column of the root table on all rows matching the condition defined by the operator, compname,
+        and compval, or the current filter if no condition is defined here.  The update has no joins, so the condition
+        can only use the root's columns.
+
+        :param name: Name of the column to update.
+        :param value: The new value of the column.
+        :param compname: The name of the column the condition is based on.
+        :param operator: the operator for the condition clause.
+        :param compval: The value to compare the current value of the column to.
+        """
+        compname = self._rootCondition(compname, operator)
+        super().UpdateValue(name, value, compname, operator, compval)
+
+    def UpdateMany(self, rows: typing.Iterable, key_column: str, columns: list = None, batch_size: int = 1000) -> int:
+        """
+        Updates a set of rows of the root table, each picked out by the value of a key column, see Table.UpdateMany.
+        The key has to be one of the root's columns.
+        """
+        self._rootColumn(self._normalizeColumn(key_column))
+        return super().UpdateMany(rows, key_column, columns, batch_size)
+
+    def Delete(self, name: str = None, operator: ComparisonOps = ComparisonOps.Noop, value: typing.Any = None):
+        """
+        Delete the rows of the root table matching the where clause whose details are passed in, or the current filter
+        if none are provided.  The delete has no joins, so the condition can only use the root's columns.
+
+        :param name: The name of the column the delete condition is based on.
+        :param operator: The operator for the condition.
+        :param value: The value to compare the current value of the column to.
+        """
+        name = self._rootCondition(name, operator)
+        super().Delete(name, operator, value)
+
+    # endregion
+
+    # region Hooks
+
+    def _hook_BuildBaseQuery(self, operation: str, columns: list = []):
+        if operation.lower() == 'select':
+            return f"Select {str.join(', ', columns)} From {self._from}"
+
+        elif operation.lower() == 'insert':
+            raise TypeError(f'{self.TableName}: add new rows through the member tables')
+
+        elif operation.lower() == 'delete':
+            return f"Delete from {self._root.TableName}"
+
+        elif operation.lower() == 'update':
+            if len(columns) == 0:
+                raise Exception()  # TODO replace with custom error for empty column list
+            sets = str.join(', ', [self._rootColumn(x) + ' = ?' for x in columns])
+            return f"Update {self._root.TableName} set {sets}"
+        else:
+            raise Exception()  # TODO replace with custom error for invalid db operation
+
+    # endregion
+
+    # region Helpers
+
+    def _normalizeColumn(self, name: str) -> str:
+        if name in self._columns:
+            return name
+
+        # not qualified - the root wins, otherwise it has to be in exactly one of the others
+        found = [f'{t}.{name}' for t, table in self._tables.items() if name in table._columns]
+        if len(found) == 0 or (len(found) > 1 and found[0] != f'{self._root.TableName}.{name}'):
+            raise ImaginaryColumn(self.TableName, name)
+        return found[0]
+
+    def _rootColumn(self, name: str) -> str:
+        # the set list of an update can't be qualified, and can only hold the root's columns
+        tname, _, col = name.partition('.')
+        if tname != self._root.TableName:
+            raise ImaginaryColumn(self._root.TableName, name)
+        return col
+
+    def _rootCondition(self, name: str, operator: ComparisonOps) -> str:
+        # the writes have no joins, so their condition (in-line, or the filters if there isn't one) can only use the
+        # root's columns
+        if operator != ComparisonOps.Noop:
+            name = self._normalizeColumn(name)
+            self._rootColumn(name)
+        else:
+            for f in self._filters:
+                for c in self._filterColumns(f):
+                    self._rootColumn(c)
+        return name
+
+    def _filterColumns(self, clause: typing.Union[Where, And, Not]) -> typing.Iterator[str]:
+        # every column named in a filter expression
+        if isinstance(clause, And):
+            for c in clause.Clauses:
+                yield from self._filterColumns(c)
+        elif isinstance(clause, Not):
+            yield from self._filterColumns(clause.Clause)
+        else:
+            yield clause.column
+
+    def _invalidate(self):
+        # the writes all land in the root, which passes it on to everything built on it (this included)
+        self.ClearResultCache()
+        self._root._invalidate()
+
+    # endregion
@@ -30,14 +30,17 @@ class JoinedTable (Table):
         self._leftcol = primaryCol
         self._rightcol = secondaryCol
 
-        # grab the client
-        self._client = primary._client
+        # share the connections with the primary
+        self._pool = primary._pool
+        self._primary = primary
 
         # init the columns dictionary and primary keys list
         self._columns = {}  # this will hold _Column objects indexed by name
         self._pks = []  # a list of the names of primary keys
         self._filters = []  # where clauses
 
+        self._initRuntime()
+
         for table in [primary, secondary]:
             # grab all the columns in the table
             for col in table._columns:
@@ -56,6 +59,10 @@ class JoinedTable (Table):
                     self._pks.append(f"{table.TableName}.{col}")
             # end for col
         # end for table
+
+        # a write to either table changes what the join returns
+        primary._addWriteListener(self.ClearResultCache)
+        secondary._addWriteListener(self.ClearResultCache)
     # end __init__()
 
     # region Hooks
@@ -69,9 +76,11 @@ class JoinedTable (Table):
         if not self._columns[name].Validate(value):
             raise InvalidColumnValue(self.TableName, name, value)
 
-    def _hook_ApplyFilters(self, query: str, params: list) -> (str, list):
+    def _hook_ApplyFilters(self, query: str, params: list, filters: list = None) -> (str, list):
+        filters = self._filters if filters is None else filters
+
         # no filters, no work to do
-        if len(self._filters):
+        if len(filters):
             # Go ahead and add the first filter outside the loop, so we only need to
             # do the check for existing where statement once - this is a possible
             # performance improvement (not big, but still....)
@@ -87,17 +96,15 @@ class JoinedTable (Table):
                 query += ' Where '
 
             # attach the first filter - outside loop because no and is needed
-            # query += f'{self._buildWhere(self._filters[0].column, self._filters[0].operator, self._filters[0].value)}'
-            query += f'{self._filters[0].column} {self._filters[0].operator.AsStr()} ?'
-            params.append(self._filters[0].value)
+            # query += f'{self._buildWhere(filters[0].column, filters[0].operator, filters[0].value)}'
+            query += self._compileFilter(filters[0], params)
 
             # add additional clauses if needed
-            if len(self._filters) > 1:
-                for f in self._filters[1:]:
+            if len(filters) > 1:
+                for f in filters[1:]:
                     # now append the actual clause
                     # query += f' and {self._buildWhere(f.column, f.operator, f.value)}'
-                    query += f' and {f.column} {f.operator.AsStr()} ?'
-                    params.append(f.value)
+                    query += f' and {self._compileFilter(f, params)}'
                 # end for filters
             # end if len > 1
         # end if len
@@ -152,6 +159,11 @@ class JoinedTable (Table):
 
     # region Helpers
 
+    def _invalidate(self):
+        # the writes all land in the primary, which passes it on to everything built on it (this included)
+        self.ClearResultCache()
+        self._primary._invalidate()
+
     def _normalizeColumn(self, name: str) -> str:
         if name in self._columns.keys():
             return name
@@ -1,13 +1,170 @@
+import logging
+import typing
+
 from Tables import Table
+from Errors import *
+from Definitions import *
+from Columns import Column
+from Indexes import Index
+
+
+log = logging.getLogger(__name__)
+
 
 class MapTable(Table):
     """
-    A map table takes two tables and sets a relationship between the two.
+    A map table takes two tables and sets a relationship between the two.  Each row of the link table pairs a key from
+    the primary with a key from the secondary, so an entry on either side can be related to any number on the other
+    (ie - people and the groups they are in).
+
+    The link table is named <primary>_<secondary>, with the columns <primary>_<column> and <secondary>_<column> (a
+    table mapped to itself gets <table>_<column>_2 for the second).  It's created without a rowid, keyed on the pair,
+    and with an index of the pair in the reverse order.  So the keys related to an entry on either side are read from a
+    single b-tree, the rows of the link table itself are never touched.
     """
 
     # TODO does this need to represented in the ini file?  if so, how?
 
     # Select A.Cols, B.Cols from A,B,M where A.ndx = M.a and M.b = B.ndx
 
-    def __init__(self, primary: Table, secondary: Table, primaryCol: str = "PrimaryKey", secondaryCol: str = "PrimaryKey"):
-        pass
\ No newline at end of file
+    def __init__(self, primary: Table, secondary: Table, primaryCol: str = "PrimaryKey",
+                 secondaryCol: str = "PrimaryKey"):
+        """
+        Constructor, creates the link table if it isn't in the database yet.
+        :param primary: The table on the left side of the relationship.
+        :param secondary: The table on the right side of the relationship.
+        :param primaryCol: The column from the primary the links hold, PrimaryKey for its (single) primary key.
+        :param secondaryCol: The column from the secondary the links hold, PrimaryKey for its (single) primary key.
+        """
+        self.TableName = f'{primary.TableName}_{secondary.TableName}'
+
+        # share the connections with the primary
+        self._pool = primary._pool
+        self._seeds = None
+
+        # init the columns dictionary and primary keys list
+        self._columns = {}  # this will hold _Column objects indexed by name
+        self._pks = []  # a list of the names of primary keys - both columns, the pair is the key
+        self._filters = []  # where clauses
+        self._indexes = []  # Index objects
+
+        self._initRuntime()
+
+        self._valid = True
+
+        for table, col in [(primary, primaryCol), (secondary, secondaryCol)]:
+            if col == "PrimaryKey":
+                if len(table._pks) != 1:
+                    raise ValueError(f'{table.TableName}: the column to link on is needed, there is no single '
+                                     f'primary key')
+                col = table._pks[0]
+            table._hook_CheckColumn(col)
+
+            name = f'{table.TableName}_{col}'
+            if name in self._columns:
+                # a table mapped to itself (ie - people and their friends), the secondary side needs its own name
+                name += '_2'
+            self._columns[name] = Column(name, f'{table._columns[col].ColumnType}, required')
+            self._pks.append(name)
+        # end for table
+
+        self._primaryCol, self._secondaryCol = self._pks
+
+        # the key covers the lookups from the primary, this covers the ones from the secondary
+        self._indexes.append(Index(f'{self.TableName}_reverse', self.TableName,
+                                   f'{self._secondaryCol}, {self._primaryCol}'))
+
+        self.Create()
+    # end __init__()
+
+    def Create(self):
+        """
+        Creates the link table and its reverse index, whichever of them are missing.
+        """
+        with self._pool.Checkout() as conn:
+            conn.execute(self.Build_SQL())
+            existing = dict(conn.execute("Select name, sql From sqlite_master Where type = 'index' and tbl_name = ? "
+                                         "and sql is not null", (self.TableName,)).fetchall())
+            self._pool.Commit(conn)
+
+        drift = self.SyncIndexes(existing)
+        if len(drift):
+            log.warning('%s: indexes differ from the ones expected: %s', self.TableName, ', '.join(drift))
+    # end Create()
+
+    # region Links
+
+    def Link(self, pairs: typing.Iterable) -> int:
+        """
+        Relates pairs of entries, the pairs already linked are skipped.  It's one prepared insert sent with
+        executemany, inside one transaction.
+
+        :param pairs: An iterable of (primary value, secondary value) tuples.
+        :return: The number of new links.
+        """
+        timer = self._startTimer('Link')
+        insert = f'Insert or Ignore Into {self.TableName} ({self._primaryCol}, {self._secondaryCol}) Values (?, ?)'
+        timer.Mark('build')
+
+        with self._pool.Transaction() as conn:
+            # the pairs are checked as executemany reads them, a bad one rolls the whole set back
+            count = conn.executemany(insert, self._checkPairs(pairs)).rowcount
+            timer.Mark('execute')
+        timer.Mark('commit')
+
+        self._invalidate()
+        timer.Done(count)
+        return count
+
+    def Unlink(self, pairs: typing.Iterable) -> int:
+        """
+        Removes the relationships between pairs of entries, the pairs which aren't linked are skipped.  It's one
+        prepared delete sent with executemany, inside one transaction.
+
+        :param pairs: An iterable of (primary value, secondary value) tuples.
+        :return: The number of links removed.
+        """
+        timer = self._startTimer('Unlink')
+        delete = f'Delete From {self.TableName} Where {self._primaryCol} = ? and {self._secondaryCol} = ?'
+        timer.Mark('build')
+
+        with self._pool.Transaction() as conn:
+            count = conn.executemany(delete, pairs).rowcount
+            timer.Mark('execute')
+        timer.Mark('commit')
+
+        self._invalidate()
+        timer.Done(count)
+        return count
+
+    def Related(self, primary_key: typing.Any, reverse: bool = False, chunk_size: int = 1000) -> typing.Iterator:
+        """
+        Streams the values linked to an entry.  Only the key (or the reverse index) is read, in order.
+
+        :param primary_key: The value from the primary to find the links of.
+        :param reverse: Look up a value from the secondary instead, and stream the primary values linked to it.
+        :param chunk_size: The number of values to read from the database at a time.
+        :return: A generator over the linked values.
+        """
+        have, want = (self._secondaryCol, self._primaryCol) if reverse else (self._primaryCol, self._secondaryCol)
+        query = f'Select {want} From {self.TableName} Where {have} = ? Order By {want}'
+
+        # hand back the bare values rather than one column tuples
+        return self._stream(query, [primary_key], chunk_size, lambda cur, row: row[0])
+
+    def _checkPairs(self, pairs: typing.Iterable) -> typing.Iterator[tuple]:
+        for first, second in pairs:
+            self._hook_ValidateColumn(self._primaryCol, first)
+            self._hook_ValidateColumn(self._secondaryCol, second)
+            yield first, second
+
+    # endregion
+
+    def Build_SQL(self):
+        """
+        Creates a SQL statement which would build the link table.
+        :return: The SQL Statement.
+        """
+        return f'Create Table If Not Exists {self.TableName} ' \
+               f'({", ".join([self._columns[c].Build_SQL() for c in self._columns.keys()])}, ' \
+               f'Primary Key ({self._primaryCol}, {self._secondaryCol})) Without RowId;'
@@ -1,11 +1,60 @@
 import configparser
+import contextlib
+import copy
+import itertools
+import json
+import logging
+import math
+import re
 import sqlite3
+import threading
+import time
 import typing
-from sqlparse import engine, tokens as Token
+import weakref
+from array import array
+from collections import OrderedDict, namedtuple
 
 from Errors import *
 from Definitions import *
 from Columns import Column
+from Indexes import Index
+from Instrumentation import Instrumentation, NULL_TIMER
+from Connections import ConnectionPool, SingleConnection
+
+
+log = logging.getLogger(__name__)
+
+# batch numbers for the values of the large IN filters, unique across every table sharing a connection
+_inBatches = itertools.count(1)
+
+
+def _hasJsonEach() -> bool:
+    with contextlib.closing(sqlite3.connect(':memory:')) as conn:
+        try:
+            conn.execute("Select value From json_each('[1]')").fetchall()
+            return True
+        except sqlite3.OperationalError:
+            return False
+
+
+_JSON_EACH = _hasJsonEach()
+
+
+class _InList(tuple):
+    """
+    The values of an IN filter.  When there are too many to bind one by one they're passed as a single json array read
+    with json_each, or if json can't carry them exactly, the list itself sits in the parameters in place of a batch
+    number and the values are loaded into a temp table when the query is run (see Table._inLists).
+    """
+
+    @property
+    def Json(self) -> typing.Optional[str]:
+        # worked out once per filter, the same list is sent every time the query runs
+        if not hasattr(self, '_json'):
+            exact = _JSON_EACH and all(type(v) is int and -2 ** 63 <= v < 2 ** 63 or type(v) is str
+                                       or type(v) is float and math.isfinite(v) for v in self)
+            self._json = json.dumps(self) if exact else None
+        return self._json
 
 
 # TODO add date as a special type (subset of text - sqlite doesn't have native date/time support)
@@ -15,9 +64,7 @@ from Columns import Column
 #   * make thread/process safe with lock/flag file (location configurable)
 # TODO check for errors raised on add - re-add value with unique on column?
 # TODO allow for comparison values in the filtering conditions to be other columns, or columns from other tables.
-# TODO switch to using prepared statements inside a query caching mechanism which would only need a new set of params
 # TODO add support for the full range of table and column names - sqlite supports almost anything with correct escaping
-# TODO revisit how the connection is made and used - protect with with stmts?  connection pool?
 
 class Table:
     """
@@ -33,10 +80,15 @@ class Table:
     __LBLPK = 'pk'  # primary key flag
     __LBLNN = 'notnull'  # notnull/nullable flag
 
+    # the sqlite functions usable in the aggregates
+    __AGGREGATES = ['count', 'sum', 'total', 'min', 'max', 'avg']
+
     #endregion
 
-    def __init__(self, section: configparser.SectionProxy, conn: sqlite3.Connection, toks={}): #TODO annotation for toks
-        self._client = conn
+    def __init__(self, section: configparser.SectionProxy, conn: typing.Union[sqlite3.Connection, ConnectionPool],
+                 toks={}): #TODO annotation for toks
+        # a bare connection gets wrapped so everything below only deals with pools
+        self._pool = conn if isinstance(conn, ConnectionPool) else SingleConnection(conn)
         self._seeds = None  # start with an empty seeding file
         self.TableName = section.name
 
@@ -44,6 +96,9 @@ class Table:
         self._columns = {}  # this will hold _Column objects indexed by name
         self._pks = []  # a list of the names of primary keys
         self._filters = []  # where clauses
+        self._indexes = []  # Index objects from the index.<name> entries
+
+        self._initRuntime()
 
         self._valid = True
 
@@ -51,6 +106,11 @@ class Table:
         if 'Values' in section.keys():
             self._seeds = section['Values']
             section.pop('Values')  # clear to not process as column
+
+        # the indexes aren't columns either
+        for key in [k for k in section.keys() if k.lower().startswith('index.')]:
+            self._indexes.append(Index(key[len('index.'):], self.TableName, section[key]))
+            section.pop(key)
         
         # the names will the keys, the details will be the value
         for col in section.keys():
@@ -76,8 +136,72 @@ class Table:
         if len(toks.keys()) != 0:
             self._valid = False
 
+        # make sure the indexes only use real columns
+        for ndx in self._indexes:
+            for c in ndx.Columns:
+                self._hook_CheckColumn(c)
+
     # end init()
 
+    def _initRuntime(self):
+        """
+        Sets up the per-instance caches and counters.  Split out of __init__ so the inheriting classes, which build
+        their columns differently, still get the same machinery.
+        """
+        # generated sql text, keyed by the shape of the query - sqlite's own statement cache reuses the compiled
+        # statement as long as the text is identical
+        self._queries = OrderedDict()
+        self._queryLock = threading.Lock()  # the table can build queries on several threads at once
+        self._queryCacheSize = 128
+        self._queryHits = 0
+        self._queryMisses = 0
+
+        # full scan warnings - off until WarnOnScan is called
+        self._scanThreshold = None
+        self._planScans = {}  # the tables each query's plan scans, by the query text
+
+        # per call timings - off until Instrument is called
+        self._instr = None
+
+        # (column, descending) pairs for the order by clause of the selects
+        self._order = []
+
+        # record classes for the rows, by column list - rows are plain tuples until UseRecords is called
+        self._records = None
+
+        # results of Get, keyed by the columns and filters - off until CacheResults is called
+        self._results = None
+        self._resultLock = threading.Lock()  # the table can be read from several threads at once
+        self._resultSize = 0
+        self._resultTTL = None
+        self._resultHits = 0
+        self._resultMisses = 0
+        self._resultEvictions = 0
+        self._resultClears = 0  # times the results were dropped, the rows from a read which saw it change aren't kept
+
+        # called after every write, so anything built on top of this table (ie - a JoinedTable) can drop its results
+        self._writeListeners = []
+
+        # IN filters with more values than this read them from a temp table instead of binding each one
+        self._inThreshold = 1000
+
+    def _fork(self) -> 'Table':
+        """
+        A copy of this table for another caller (ie - an AsyncTable), sharing the columns and connections but with its
+        own filters, ordering and caches, so neither changes what the other reads.  The writes made through the copy
+        are passed on to this table, and from here to everything built on it.
+        """
+        fork = copy.copy(self)
+        fork._filters = list(self._filters)
+        fork._order = list(self._order)
+        fork._queries = OrderedDict()
+        fork._queryLock = threading.Lock()
+        fork._planScans = {}
+        fork._results = None
+        fork._resultLock = threading.Lock()
+        fork._writeListeners = [weakref.WeakMethod(self._invalidate)]
+        return fork
+
     def Create(self):
         """
         Adds the
@@ -85,8 +209,11 @@ class Table:
         """
         sql = self.Build_SQL()
         try:
-            with self._client:
-                self._client.execute(sql)
+            with self._pool.Checkout() as conn:
+                conn.execute(sql)
+                for ndx in self._indexes:
+                    conn.execute(ndx.Build_SQL())
+                self._pool.Commit(conn)
         except sqlite3.DataError as de:
             pass
         except sqlite3.IntegrityError as ie:
@@ -95,6 +222,32 @@ class Table:
         # now grab the seed data and write it to the DB
     # end Create()
 
+    def SyncIndexes(self, existing: dict) -> list:
+        """
+        Compares the indexes from the ini file with the ones already in the database.  Any missing indexes are created,
+        the ones which don't match are left alone and reported.
+
+        :param existing: Map of the names of the indexes sqlite has for this table to their create statements.
+        :return: The names of the indexes which are different in the database, or only in the database.
+        """
+        existing = {k.lower(): v for k, v in existing.items()}
+        drift = []
+
+        with self._pool.Checkout() as conn:
+            for ndx in self._indexes:
+                sql = existing.pop(ndx.Name.lower(), None)
+                if sql is None:
+                    conn.execute(ndx.Build_SQL())
+                elif not ndx.Matches(sql):
+                    drift.append(ndx.Name)
+            # end for ndx
+            self._pool.Commit(conn)
+
+        # whatever is left isn't in the ini file
+        drift.extend(existing.keys())
+
+        return drift
+
     # region Hooks
     # These functions are available for inheriting classes to override, to change the behavior across multiple calls
     # within the API.
@@ -107,9 +260,12 @@ class Table:
         if not self._columns[name].Validate(value):
             raise InvalidColumnValue(self.TableName, name, value)
 
-    def _hook_ApplyFilters(self, query: str, params: list) -> (str, list):
+    def _hook_ApplyFilters(self, query: str, params: list, filters: list = None) -> (str, list):
+        # the class filters unless the caller has its own set (ie - GetPage adding the keyset clause)
+        filters = self._filters if filters is None else filters
+
         # no filters, no work to do
-        if len(self._filters):
+        if len(filters):
             # Go ahead and add the first filter outside the loop, so we only need to
             # do the check for existing where statement once - this is a possible
             # performance improvement (not big, but still....)
@@ -125,17 +281,15 @@ class Table:
                 query += ' Where '
 
             # attach the first filter - outside loop because no and is needed
-            # query += f'{self._buildWhere(self._filters[0].column, self._filters[0].operator, self._filters[0].value)}'
-            query += f'{self._filters[0].column} {self._filters[0].operator.AsStr()} ?'
-            params.append(self._filters[0].value)
+            # query += f'{self._buildWhere(filters[0].column, filters[0].operator, filters[0].value)}'
+            query += self._compileFilter(filters[0], params)
 
             # add additional clauses if needed
-            if len(self._filters) > 1:
-                for f in self._filters[1:]:
+            if len(filters) > 1:
+                for f in filters[1:]:
                     # now append the actual clause
                     # query += f' and {self._buildWhere(f.column, f.operator, f.value)}'
-                    query += f' and {f.column} {f.operator.AsStr()} ?'
-                    params.append(f.value)
+                    query += f' and {self._compileFilter(f, params)}'
                 # end for filters
             # end if len > 1
         # end if len
@@ -157,6 +311,14 @@ class Table:
 
         return query, params
 
+    def _hook_ApplyOrder(self, query: str, order: tuple, paged: bool = False) -> str:
+        if len(order):
+            query += f" Order By {str.join(', ', [f'{c} desc' if d else c for c, d in order])}"
+        # the page size and offset are parameters, so every page shares the one statement
+        if paged:
+            query += ' Limit ? Offset ?'
+        return query
+
     def _hook_BuildBaseQuery(self, operation: str, columns: list = []):
         if operation.lower() == 'select':
             return f"Select {str.join(', ', columns)} From {self.TableName}"
@@ -188,19 +350,480 @@ class Table:
 
     #endregion
 
+    #region Query Cache
+
+    def _filterSignature(self) -> tuple:
+        """
+        The shape of the current filters - everything which changes the sql text, but none of the values.
+        """
+        return tuple(self._filterShape(f) for f in self._filters)
+
+    def _filterParams(self) -> list:
+        """
+        The values of the current filters, in the same order _hook_ApplyFilters adds them.
+        """
+        params = []
+        for f in self._filters:
+            self._compileFilter(f, params, False)
+        return params
+
+    def _buildQuery(self, operation: str, columns: typing.Iterable = (), params: list = None, inline: tuple = None,
+                    order: tuple = None, seek: Where = None, paged: bool = False, group: tuple = ()) -> (str, list):
+        """
+        Builds the sql for an operation through the hooks, or reuses the text from the last time a query with the same
+        shape was built.  Only the parameters are regenerated on a hit.
+
+        :param operation: The operation passed to _hook_BuildBaseQuery.
+        :param columns: The columns passed to _hook_BuildBaseQuery.
+        :param params: Any parameters which come before the where clause (ie - the values in an update).
+        :param inline: The column name, operator, and value of an in-line filter.  The class filters are used if None.
+        :param order: The (column, descending) pairs to sort a select by, defaults to the ones set with OrderBy.
+        :param seek: An extra filter added after the class filters (the keyset clause of GetPage).
+        :param paged: Adds the limit and offset placeholders, the caller adds their values after the returned params.
+        :param group: The columns for the group by clause of a select.
+        :return: The query and the full list of parameters.
+        """
+        params = [] if params is None else params
+        columns = tuple(columns)
+
+        # only the selects are sorted
+        if operation == 'select':
+            order = tuple(self._order) if order is None else tuple(order)
+        else:
+            order = ()
+
+        # inserts never take a where clause
+        if operation == 'insert':
+            key = (operation, columns)
+        elif inline is not None:
+            key = (operation, columns, 'inline', inline[0], inline[1])
+        else:
+            key = (operation, columns, self._filterSignature(), order,
+                   None if seek is None else (seek.column, seek.operator), paged, tuple(group))
+
+        with self._queryLock:
+            query = self._queries.get(key)
+            if query is not None:
+                self._queryHits += 1
+                self._queries.move_to_end(key)
+            else:
+                self._queryMisses += 1
+
+        if query is not None:
+            if operation == 'insert':
+                pass
+            elif inline is not None:
+                # the column was checked when the query was first built, the value still needs it
+                self._hook_ValidateColumn(inline[0], inline[2])
+                params.append(inline[2])
+            else:
+                params.extend(self._filterParams())
+                if seek is not None:
+                    params.append(seek.value)
+
+            return query, params
+        # end if hit
+
+        query = self._hook_BuildBaseQuery(operation, list(columns))
+        if operation == 'insert':
+            pass
+        elif inline is not None:
+            query, params = self._hook_InLineFilter(query, params, *inline)
+        else:
+            query, params = self._hook_ApplyFilters(query, params,
+                                                    None if seek is None else self._filters + [seek])
+            if len(group):
+                query += f" Group By {str.join(', ', group)}"
+            query = self._hook_ApplyOrder(query, order, paged)
+
+        # save it, dropping the least recently used entry if full
+        with self._queryLock:
+            self._queries[key] = query
+            while len(self._queries) > self._queryCacheSize:
+                self._queries.popitem(last=False)
+
+        return query, params
+
+    @contextlib.contextmanager
+    def _execute(self, conn: sqlite3.Connection, query: str, params: list) -> typing.Iterator[sqlite3.Cursor]:
+        """
+        Context manager which runs a query on a checked out connection, checking its plan first if the scan warnings
+        are on.  Any large IN lists are loaded for the query and dropped once the block exits, so a cursor still being
+        read has to be finished inside the block.
+        """
+        with self._inLists(conn, params) as params:
+            if self._scanThreshold is not None:
+                self._checkPlan(conn, query, params)
+
+            yield conn.execute(query, params)
+
+    @contextlib.contextmanager
+    def _inLists(self, conn: sqlite3.Connection, params: list) -> typing.Iterator[list]:
+        """
+        Context manager which loads the values of the large IN filters which can't go as json into the temp table, each
+        list with its own batch number, and removes them again when the block exits.
+        :return: The parameters with the lists swapped for their batch numbers.
+        """
+        if not any(isinstance(p, _InList) for p in params):
+            yield params
+            return
+
+        # temp tables belong to the connection, so each one makes its own the first time
+        conn.execute('Create Temp Table If Not Exists litedao_in (batch integer, value, primary key (batch, value)) '
+                     'Without Rowid')
+
+        bound = []
+        batches = []
+        try:
+            for p in params:
+                if isinstance(p, _InList):
+                    batch = next(_inBatches)
+                    batches.append((batch,))
+                    conn.executemany('Insert or Ignore into temp.litedao_in (batch, value) values (?, ?)',
+                                     zip(itertools.repeat(batch), p))
+                    p = batch
+                bound.append(p)
+            # end for p
+
+            yield bound
+        finally:
+            conn.executemany('Delete from temp.litedao_in where batch = ?', batches)
+            # the loading started a transaction if there wasn't one
+            self._pool.Commit(conn)
+
+    @property
+    def InListThreshold(self) -> int:
+        return self._inThreshold
+
+    @InListThreshold.setter
+    def InListThreshold(self, value: int):
+        self._inThreshold = value
+
+    def _checkPlan(self, conn: sqlite3.Connection, query: str, params: list):
+        """
+        Logs a warning for every full table scan in the plan for a query, if the table is over the threshold.  The plan
+        is only read the first time the query runs, but the tables it scans are sized every time, since they grow.
+        """
+        scans = self._planScans.get(query)
+        if scans is None:
+            scans = []
+            for row in conn.execute(f'explain query plan {query}', params).fetchall():
+                # newer sqlite says 'SCAN Person', older says 'SCAN TABLE Person'
+                found = re.match(r'SCAN (?:TABLE )?(\w+)', row[3])
+                if found is not None:
+                    scans.append((found.group(1), row[3]))
+            # end for row
+            self._planScans[query] = scans
+
+        for name, detail in scans:
+            count = self._estimateRows(conn, name)
+            if count is not None and count > self._scanThreshold:
+                log.warning(f'{self.TableName}: query scans {count} rows of {name} ({detail}): {query}')
+        # end for name
+
+    def _estimateRows(self, conn: sqlite3.Connection, name: str) -> typing.Optional[int]:
+        """
+        A cheap guess at the number of rows in a table, without reading them all - the count from the last analyze if
+        there is one, otherwise the largest rowid.
+        :return: The guess, or None if name isn't a plain table in the main database (ie - a virtual table, the temp
+        table of an IN filter) or it has no rowid.
+        """
+        found = conn.execute("select sql from main.sqlite_master where type = 'table' and name = ? collate nocase",
+                             (name,)).fetchone()
+        if found is None or found[0].lower().startswith('create virtual'):
+            return None
+
+        try:
+            stat = conn.execute('select stat from main.sqlite_stat1 where tbl = ? collate nocase', (name,)).fetchone()
+            if stat is not None:
+                return int(stat[0].split()[0])
+        except sqlite3.OperationalError:
+            pass  # never analyzed
+
+        try:
+            return conn.execute(f'select max(rowid) from main.{name}').fetchone()[0] or 0
+        except sqlite3.OperationalError:
+            return None  # without rowid
+
+    def ClearQueryCache(self):
+        """
+        Empties the generated sql cache and resets the counters.
+        """
+        with self._queryLock:
+            self._queries.clear()
+            self._queryHits = 0
+            self._queryMisses = 0
+
+    @property
+    def QueryCacheHits(self) -> int:
+        return self._queryHits
+
+    @property
+    def QueryCacheMisses(self) -> int:
+        return self._queryMisses
+
+    @property
+    def QueryCacheSize(self) -> int:
+        return self._queryCacheSize
+
+    @QueryCacheSize.setter
+    def QueryCacheSize(self, value: int):
+        with self._queryLock:
+            self._queryCacheSize = value
+            while len(self._queries) > self._queryCacheSize:
+                self._queries.popitem(last=False)
+
+    #endregion
+
+    #region Filter Expressions
+
+    def _checkFilter(self, clause: typing.Union[Where, And, Not]) -> typing.Union[Where, And, Not]:
+        """
+        Verifies the columns and values throughout a filter expression.
+        :return: A copy of the expression with the column names normalized and the lists of values made into tuples.
+        """
+        if isinstance(clause, And):
+            if len(clause.Clauses) == 0:
+                raise ValueError(f'{self.TableName}: {type(clause).__name__} needs at least one clause')
+            return type(clause)(*[self._checkFilter(c) for c in clause.Clauses])
+        elif isinstance(clause, Not):
+            return Not(self._checkFilter(clause.Clause))
+        elif not isinstance(clause, Where):
+            raise TypeError(f'{self.TableName}: {clause!r} is not a filter')
+
+        if clause.operator == ComparisonOps.Noop:
+            raise ValueError(f'{self.TableName}: the filter on {clause.column} needs an operator')
+
+        # verify the column
+        name = self._normalizeColumn(clause.column)
+        value = clause.value
+
+        # TODO verify the operation is valid for the column type
+
+        # verify the values are the correct type
+        if clause.operator == ComparisonOps.BETWEEN:
+            if not isinstance(value, (list, tuple)) or len(value) != 2:
+                raise ValueError(f'{self.TableName}: between needs a low and a high value')
+            value = tuple(value)
+        elif clause.operator == ComparisonOps.IN and isinstance(value, (list, tuple, set, frozenset)):
+            value = _InList(value)
+
+        clause = Where(column=name, operator=clause.operator, value=value)
+
+        # only the operators which take a list have their values checked one at a time
+        for v in value if self._isList(clause) else [value]:
+            self._hook_ValidateColumn(name, v)
+
+        return clause
+
+    def _filterShape(self, clause: typing.Union[Where, And, Not]) -> tuple:
+        """
+        The part of a filter expression which changes the sql text - the structure, columns, operators, and the number
+        of values in the lists.
+        """
+        if isinstance(clause, And):
+            return clause.Joiner, tuple(self._filterShape(c) for c in clause.Clauses)
+        elif isinstance(clause, Not):
+            return 'not', self._filterShape(clause.Clause)
+        elif self._isList(clause):
+            if self._isLargeIn(clause):
+                return clause.column, clause.operator, 'temp' if clause.value.Json is None else 'json'
+            return clause.column, clause.operator, len(clause.value)
+        return clause.column, clause.operator
+
+    def _compileFilter(self, clause: typing.Union[Where, And, Not], params: list, sql: bool = True) -> str:
+        """
+        Turns a filter expression into the text for the where clause, adding its values to params.
+        :param clause: The Where entry or expression.
+        :param params: The list to add the values to, in the order of their placeholders.
+        :param sql: False skips building the text, only the values are wanted.
+        :return: The text of the condition.
+        """
+        if isinstance(clause, And):
+            parts = [self._compileFilter(c, params, sql) for c in clause.Clauses]
+            return f"({str.join(f' {clause.Joiner} ', parts)})" if sql else ''
+        elif isinstance(clause, Not):
+            part = self._compileFilter(clause.Clause, params, sql)
+            return f'not ({part})' if sql else ''
+
+        if self._isLargeIn(clause):
+            # too many to bind, the values are sent as one json array or read from the temp table (see _inLists)
+            if clause.value.Json is not None:
+                params.append(clause.value.Json)
+                return f'{clause.column} in (select value from json_each(?))' if sql else ''
+            params.append(clause.value)
+            return f'{clause.column} in (select value from temp.litedao_in where batch = ?)' if sql else ''
+
+        if self._isList(clause):
+            params.extend(clause.value)
+            if not sql:
+                return ''
+            if clause.operator == ComparisonOps.BETWEEN:
+                return f'{clause.column} between ? and ?'
+            return f"{clause.column} {clause.operator.AsStr()} ({str.join(', ', ['?'] * len(clause.value))})"
+
+        params.append(clause.value)
+        return f'{clause.column} {clause.operator.AsStr()} ?' if sql else ''
+
+    def _isList(self, clause: Where) -> bool:
+        return clause.operator in (ComparisonOps.IN, ComparisonOps.BETWEEN) and isinstance(clause.value, tuple)
+
+    def _isLargeIn(self, clause: Where) -> bool:
+        return clause.operator == ComparisonOps.IN and isinstance(clause.value, _InList) \
+            and len(clause.value) > self._inThreshold
+
+    #endregion
+
+    #region Result Cache
+
+    def CacheResults(self, size: int = 256, ttl: typing.Optional[float] = None):
+        """
+        Turns on caching of the rows returned by Get (and GetAll), keyed by the columns and the filters, values
+        included.  Every Add, AddMany, UpdateValue and Delete made through this table, or any JoinedTable built on it,
+        drops the cached results.  Nothing read inside a transaction is kept, and the end of any transaction on the
+        pool (commit or rollback) makes the results cached before it stale.  Writes made any other way (raw sql,
+        another process) aren't seen, the ttl puts a limit on how stale the results can get.
+
+        :param size: The most results to hold, the least recently used is dropped beyond that.
+        :param ttl: How many seconds a result is good for, None to keep it until it's dropped.
+        """
+        with self._resultLock:
+            self._results = OrderedDict()
+        self._resultSize = size
+        self._resultTTL = ttl
+        self._resultHits = 0
+        self._resultMisses = 0
+        self._resultEvictions = 0
+
+    def StopCaching(self):
+        """
+        Turns off the result cache and drops everything in it.
+        """
+        with self._resultLock:
+            self._results = None
+
+    def ClearResultCache(self):
+        """
+        Drops all the cached results, the counters are kept.
+        """
+        with self._resultLock:
+            self._resultClears += 1
+            if self._results is not None:
+                self._results.clear()
+
+    def _resultKey(self, columns: list) -> typing.Optional[tuple]:
+        """
+        The key for the results of a Get with the current filters.
+        :return: The key, or None if caching is off or the filter values can't be used in a key.
+        """
+        if self._results is None:
+            return None
+
+        key = (tuple(columns), self._filterSignature(), tuple(self._filterParams()), tuple(self._order))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def _resultState(self) -> tuple:
+        """
+        Taken before a read, if it's any different afterwards the rows read may already be out of date.
+        """
+        return self._pool.Generation, self._resultClears
+
+    def _cachedResult(self, key: tuple) -> typing.Optional[list]:
+        with self._resultLock:
+            entry = None if self._results is None else self._results.get(key)
+            if entry is not None:
+                expires, generation, rows = entry
+                # a transaction which ended since (committed or rolled back) may have changed the rows
+                if (expires is None or expires > time.monotonic()) and generation == self._pool.Generation:
+                    self._resultHits += 1
+                    self._results.move_to_end(key)
+                    return rows
+
+                # too old
+                del self._results[key]
+                self._resultEvictions += 1
+            # end if entry
+
+            self._resultMisses += 1
+            return None
+
+    def _cacheResult(self, key: tuple, rows: list, state: tuple):
+        # rows read inside a transaction may never be committed, and a write or the end of a transaction while they
+        # were being read means they may be stale already
+        if self._pool.InTransaction:
+            return
+
+        expires = None if self._resultTTL is None else time.monotonic() + self._resultTTL
+        with self._resultLock:
+            # checked under the lock, so a clear can't land between the check and the store
+            if self._results is None or state != self._resultState():
+                return
+
+            self._results[key] = (expires, state[0], rows)
+            self._results.move_to_end(key)
+            while len(self._results) > self._resultSize:
+                self._results.popitem(last=False)
+                self._resultEvictions += 1
+
+    def _invalidate(self):
+        """
+        Called after a write - drops the cached results here and tells the listeners.
+        """
+        self.ClearResultCache()
+
+        # the listeners are weak, a JoinedTable which has been dropped shouldn't be kept alive by this table
+        for ref in list(self._writeListeners):
+            listener = ref()
+            if listener is None:
+                self._writeListeners.remove(ref)
+            else:
+                listener()
+
+    def _addWriteListener(self, listener: typing.Callable[[], None]):
+        """
+        Registers a bound method to be called after every write made through this table.
+        """
+        self._writeListeners.append(weakref.WeakMethod(listener))
+
+    @property
+    def ResultCacheHits(self) -> int:
+        return self._resultHits
+
+    @property
+    def ResultCacheMisses(self) -> int:
+        return self._resultMisses
+
+    @property
+    def ResultCacheEvictions(self) -> int:
+        return self._resultEvictions
+
+    @property
+    def ResultCacheHitRatio(self) -> float:
+        total = self._resultHits + self._resultMisses
+        return self._resultHits / total if total else 0.0
+
+    #endregion
+
     #region DB Interactions
 
-    def Join(self, other, otherCol: str, myCol: str):
+    def Join(self, other, otherCol: str, myCol: str, inner: bool = False):
         """
         Creates a psuedo-table by performing a left join on the table other.
-        This will only join on equals between two columns.
+        This will only join on equals between two columns.  More tables can be joined on to the result, see JoinChain.
 
         :param other: The table to join with.
         :param otherCol: The name of the column from the other table to join with.
         :param myCol: The the name of the column from within this table to match to otherCol.
-        :return:
+        :param inner: Only keep the rows which have a match in other, instead of a left join.
+        :return: The JoinChain holding both tables.
         """
-        pass
+        # imported here, JoinChain is built on this class
+        from JoinChain import JoinChain
+        return JoinChain(self).Join(other, otherCol, myCol, inner)
 
     def GetAll(self) -> list:
         """
@@ -218,6 +841,7 @@ class Table:
         :return:
         """
 
+        timer = self._startTimer('Get')
         params = []  # this will be the second arg with the order parameters into the query
 
         # sanity check the columns
@@ -225,17 +849,193 @@ class Table:
             self._hook_CheckColumn(c)
         # end for c
 
-        # initialize the select statement
-        query = self._hook_BuildBaseQuery('select', columns)  # returning each letter in column name as a column....
+        # a repeat of an earlier read doesn't need the database at all
+        key = self._resultKey(columns)
+        if key is not None:
+            rows = self._cachedResult(key)
+            if rows is not None:
+                timer.Mark('fetch')
+                timer.Done(len(rows))
+                return list(rows)
+        # end if key
 
-        # get all the filters into where clauses
-        query, params = self._hook_ApplyFilters(query, params)
+        # build the select statement with all the filters as where clauses
+        query, params = self._buildQuery('select', columns, params)
+        timer.Mark('build')
 
-        # execute the query
-        cur = self._client.execute(query, params)
+        # execute the query and marshall the results
+        state = self._resultState()
+        rows = self._fetchAll(query, params, columns, timer)
 
-        # marshall the results and return the rows
-        return cur.fetchall()
+        if key is not None:
+            self._cacheResult(key, rows, state)
+
+        timer.Done(len(rows))
+        return rows if key is None else list(rows)
+
+    def GetPage(self, columns: list, order_by: str, after: typing.Any = None, size: int = 100, offset: int = 0,
+                descending: bool = False) -> list:
+        """
+        Retrieves one page of rows sorted by a column.  Without after this is plain offset paging, skipping the first
+        offset rows.  With after (the order_by value of the last row on the previous page) it's keyset paging, only the
+        rows past that value are read - with an index on order_by sqlite seeks straight to them, so a deep page costs
+        the same as the first one.  Keyset paging needs order_by to be unique (ie - the primary key), otherwise rows
+        tied with after are skipped.  The filters still apply, the ordering set with OrderBy is replaced by order_by.
+
+        :param columns: A list of the column names to select, include order_by to have the value for the next page.
+        :param order_by: The column to sort by.
+        :param after: The value of order_by to start after, None to start from the beginning.
+        :param size: The most rows to return.
+        :param offset: The number of rows to skip.
+        :param descending: Sorts high to low, after then starts below the value.
+        :return: The rows on the page.
+        """
+        timer = self._startTimer('GetPage')
+
+        # sanity check the columns
+        for c in columns:
+            self._hook_CheckColumn(c)
+        # end for c
+        order_by = self._normalizeColumn(order_by)
+
+        # the keyset clause rides along with the filters
+        seek = None
+        if after is not None:
+            self._hook_ValidateColumn(order_by, after)
+            seek = Where(column=order_by, operator=ComparisonOps.LESSER if descending else ComparisonOps.GREATER,
+                         value=after)
+
+        query, params = self._buildQuery('select', columns, [], order=((order_by, descending),), seek=seek,
+                                         paged=True)
+        params.extend([size, offset])
+        timer.Mark('build')
+
+        rows = self._fetchAll(query, params, columns, timer)
+
+        timer.Done(len(rows))
+        return rows
+
+    def _fetchAll(self, query: str, params: list, columns: list, timer) -> list:
+        """
+        Runs a select and reads all the rows, as records if they're turned on.
+        """
+        with self._pool.Checkout() as conn, self._execute(conn, query, params) as cur:
+            if self._records is not None:
+                cur.row_factory = self._rowFactory(columns)
+            timer.Mark('execute')
+            rows = cur.fetchall()
+            timer.Mark('fetch')
+        return rows
+
+    def IterAll(self, chunk_size: int = 1000) -> typing.Iterator:
+        """
+        Streams all the columns in the table.  Any filters set still apply to the results.
+        :param chunk_size: The number of rows to read from the database at a time.
+        :return: A generator over the rows.
+        """
+        return self.Iter(list(self._columns.keys()), chunk_size)
+
+    def Iter(self, columns: list, chunk_size: int = 1000) -> typing.Iterator:
+        """
+        Streams the values of a set of columns, holding only chunk_size rows in memory at once.  The query is built
+        from the filters in place when this is called, later changes to the filters do not affect it.
+
+        :param columns: A list of the column names to select.
+        :param chunk_size: The number of rows to read from the database at a time.
+        :return: A generator over the rows.
+        """
+        params = []
+
+        # sanity check the columns before handing back the generator, so bad names fail at the call
+        for c in columns:
+            self._hook_CheckColumn(c)
+        # end for c
+
+        query, params = self._buildQuery('select', columns, params)
+
+        return self._stream(query, params, chunk_size, self._rowFactory(columns))
+
+    def _stream(self, query: str, params: list, chunk_size: int, factory: typing.Callable = None) -> typing.Iterator:
+        """
+        Generator which runs a query and yields the rows one fetchmany chunk at a time.
+        """
+        for rows in self._chunks(query, params, chunk_size, factory):
+            yield from rows
+
+    def _chunks(self, query: str, params: list, chunk_size: int, factory: typing.Callable = None) \
+            -> typing.Iterator[list]:
+        """
+        Generator which runs a query and yields each fetchmany chunk of rows.
+        """
+        # the connection stays checked out until the generator finishes or is closed
+        with self._pool.Checkout() as conn, self._execute(conn, query, params) as cur:
+            if factory is not None:
+                cur.row_factory = factory
+            try:
+                rows = cur.fetchmany(chunk_size)
+                while rows:
+                    yield rows
+                    rows = cur.fetchmany(chunk_size)
+            finally:
+                cur.close()
+
+    def GetColumns(self, columns: list, as_numpy: bool = False, chunk_size: int = 10000) -> dict:
+        """
+        Retrieves a set of columns column-wise instead of row-wise.  Integer and real columns come back as array('q')
+        and array('d'), the rest as lists.  The rows are read in chunks and added to the columns as they arrive, so the
+        full list of rows is never held.
+
+        A null in a real column becomes nan.  An integer column holding nulls can't be an array, so it comes back as a
+        list.
+
+        :param columns: A list of the column names to select.
+        :param as_numpy: Return numpy arrays instead (int64, float64, or object for everything else).
+        :param chunk_size: The number of rows to read from the database at a time.
+        :return: Map of the column names to their values, in the order they were asked for.
+        """
+        # numpy is optional, and slow to import, so it's only loaded when asked for
+        if as_numpy:
+            try:
+                import numpy
+            except ImportError:
+                raise ImportError('GetColumns(as_numpy=True) needs numpy installed')
+
+        params = []
+
+        # sanity check the columns
+        for c in columns:
+            self._hook_CheckColumn(c)
+        # end for c
+
+        query, params = self._buildQuery('select', columns, params)
+
+        # start each column off with the best container for its type
+        types = [self._columns[c].ColumnType for c in columns]
+        data = [array('q') if t == 'integer' else array('d') if t == 'real' else [] for t in types]
+
+        for rows in self._chunks(query, params, chunk_size):
+            for j, values in enumerate(zip(*rows)):
+                vec = data[j]
+                if types[j] == 'real':
+                    vec.extend([math.nan if v is None else v for v in values])
+                elif isinstance(vec, array):
+                    size = len(vec)
+                    try:
+                        vec.extend(values)
+                    except TypeError:
+                        # a null, this column has to be a list from here on - the failed extend may have added some
+                        data[j] = vec[:size].tolist()
+                        data[j].extend(values)
+                else:
+                    vec.extend(values)
+            # end for values
+        # end for rows
+
+        if as_numpy:
+            data = [numpy.frombuffer(vec, dtype=numpy.int64 if vec.typecode == 'q' else numpy.float64)
+                    if isinstance(vec, array) else numpy.array(vec, dtype=object) for vec in data]
+
+        return dict(zip(columns, data))
 
     def Add(self, values):
         """
@@ -243,6 +1043,7 @@ class Table:
         :param values: A map of the column names and values.  Any missing values will be filled in with the default value (except primary keys).
         """
 
+        timer = self._startTimer('Add')
         cols = list(self._columns.keys()) # these will be the ones which get default values
         vals = {}
 
@@ -266,13 +1067,218 @@ class Table:
         # for JoinedTable there is a need to get the left_col adn right_col values aligned in the query
 
         # with all the
-        insert = self._hook_BuildBaseQuery('insert', vals.keys())
+        insert, _ = self._buildQuery('insert', vals.keys())
         params = list(vals.values())  # this will be the second arg with the order parameters into the query
+        timer.Mark('build')
 
         # perform the action
-        cur = self._client.cursor()
-        cur.execute(insert, params)
-        self._client.commit()
+        with self._pool.Checkout() as conn:
+            conn.execute(insert, params)
+            timer.Mark('execute')
+            self._pool.Commit(conn)
+            timer.Mark('commit')
+
+        self._invalidate()
+        timer.Done(1)
+
+    def AddMany(self, rows: typing.Iterable, columns: list = None, batch_size: int = 1000) -> int:
+        """
+        Adds a set of new entries to the table using a single prepared insert.  The rows are sent to the database in
+        batches of batch_size, all inside one transaction, so either every row is added or (if one fails) none are.
+
+        :param rows: An iterable of either maps of column names and values (as in Add), or tuples of values.
+        :param columns: The column names matching the positions in tuple rows.  Defaults to all of the non-primary key
+        columns in table order.
+        :param batch_size: The number of rows to send in each executemany call.
+        :return: The number of rows added.
+        """
+
+        # the insert always covers every non-pk column, missing values are filled in with the defaults
+        cols = [c for c in self._columns.keys() if c not in self._pks]
+
+        if columns is None:
+            columns = cols
+        else:
+            for c in columns:
+                self._hook_CheckColumn(c)
+
+        # resolve the per-column details once instead of once per row
+        defaults = [self._columns[c].Default for c in cols]
+        positions = [columns.index(c) if c in columns else -1 for c in cols]
+
+        insert, _ = self._buildQuery('insert', cols)
+
+        # tuple rows only supply the listed columns, the rest are all defaults and don't need checking
+        listed = [c for c, p in zip(cols, positions) if p >= 0]
+        supplied = listed
+        added = 0
+        batch = []
+
+        # one transaction for the whole set, a bad row in a later batch takes the earlier ones with it
+        with self._pool.Transaction() as conn:
+            for row in rows:
+                if isinstance(row, dict):
+                    for k in row.keys():
+                        self._hook_CheckColumn(k)
+                    vals = [row.get(c, d) for c, d in zip(cols, defaults)]
+                    supplied = cols
+                else:
+                    vals = [row[p] if p >= 0 else d for p, d in zip(positions, defaults)]
+
+                batch.append(vals)
+
+                if len(batch) >= batch_size:
+                    added += self._insertBatch(conn, insert, cols, batch, supplied)
+                    batch = []
+                    supplied = listed
+            # end for row
+
+            # flush the partial batch
+            if len(batch):
+                added += self._insertBatch(conn, insert, cols, batch, supplied)
+        # end with transaction
+
+        return added
+
+    def _insertBatch(self, conn: sqlite3.Connection, insert: str, cols: list, batch: list, check: list) -> int:
+        """
+        Validates one batch of parameter lists a column at a time, then sends it through the prepared insert.  It's
+        committed along with the rest of the transaction the caller has open.
+        :param conn: The connection of the caller's transaction.
+        :param insert: The insert statement.
+        :param cols: The columns in the insert, in order.
+        :param batch: A list of parameter lists, one per row.
+        :param check: The columns which need validating.
+        :return: The number of rows added.
+        """
+        self._validateBatch(cols, batch, check)
+        conn.executemany(insert, batch)
+
+        self._invalidate()
+        return len(batch)
+
+    def _validateBatch(self, cols: list, batch: list, check: typing.Collection):
+        """
+        Validates a batch of parameter lists a column at a time, raising InvalidColumnValue for the first bad value.
+        :param cols: The columns matching the positions in each parameter list.
+        :param batch: A list of parameter lists, one per row.
+        :param check: The columns which need validating.
+        """
+        for j, c in enumerate(cols):
+            if c not in check:
+                continue
+            vector = [r[j] for r in batch]
+            failed = self._columns[c].ValidateMany(vector)
+            if len(failed):
+                raise InvalidColumnValue(self.TableName, c, vector[failed[0]])
+        # end for cols
+
+    def Upsert(self, rows: typing.Iterable, conflict_columns: list, update_columns: list, columns: list = None,
+               batch_size: int = 1000) -> (int, int):
+        """
+        Adds a set of entries, updating the existing row instead whenever one already has the same values in the
+        conflict columns.  It's a single prepared insert ... on conflict do update statement sent in batches, all
+        inside one transaction.
+
+        :param rows: An iterable of either maps of column names and values, or tuples of values.
+        :param conflict_columns: The columns which decide if a row is already there, they have to be the primary key,
+        a unique column, or the columns of a unique index.
+        :param update_columns: The columns to overwrite on the existing rows, the others keep their values.  Empty
+        leaves the existing rows alone.  A map missing one of these overwrites it with the default.
+        :param columns: The column names matching the positions in tuple rows.  Defaults to the conflict columns
+        followed by the update columns.
+        :param batch_size: The number of rows to send in each executemany call.
+        :return: The number of rows inserted and the number updated (or left alone, when update_columns is empty, then
+        it is 0).
+        """
+        conflict_columns = list(conflict_columns)
+        update_columns = list(update_columns)
+        for c in conflict_columns + update_columns:
+            self._hook_CheckColumn(c)
+
+        # sqlite refuses the statement if the conflict columns aren't covered by a constraint, say why up front
+        target = set(conflict_columns)
+        if target != set(self._pks) \
+                and not (len(target) == 1 and self._columns[conflict_columns[0]].Unique) \
+                and not any(ndx.Unique and not ndx.IsPartial and set(ndx.Columns) == target for ndx in self._indexes):
+            raise ValueError(f'{self.TableName}: {", ".join(conflict_columns)} is not a primary key or unique')
+
+        if columns is None:
+            columns = conflict_columns + [c for c in update_columns if c not in target]
+        else:
+            for c in columns:
+                self._hook_CheckColumn(c)
+
+        # the insert covers every column, like AddMany the missing ones get their defaults (sqlite picks the keys)
+        cols = columns + [c for c in self._columns.keys() if c not in columns]
+        defaults = [None if c in self._pks else self._columns[c].Default for c in cols]
+        positions = list(range(len(columns))) + [-1] * (len(cols) - len(columns))
+
+        insert, _ = self._buildQuery('insert', cols)
+        if len(update_columns):
+            insert += f" On Conflict ({str.join(', ', conflict_columns)}) Do Update Set " \
+                      f"{str.join(', ', [f'{c} = excluded.{c}' for c in update_columns])}"
+        else:
+            insert += f" On Conflict ({str.join(', ', conflict_columns)}) Do Nothing"
+
+        # the conflict columns have a unique index, so looking the keys up costs one seek each
+        keys = [cols.index(c) for c in conflict_columns]
+        inserted = 0
+        updated = 0
+        with self._pool.Transaction() as conn:
+            supplied = set(columns)
+            batch = []
+            for row in rows:
+                if isinstance(row, dict):
+                    for k in row.keys():
+                        self._hook_CheckColumn(k)
+                    vals = [row.get(c, d) for c, d in zip(cols, defaults)]
+                    supplied.update(row.keys())
+                else:
+                    vals = [row[p] if p >= 0 else d for p, d in zip(positions, defaults)]
+
+                batch.append(vals)
+
+                if len(batch) >= batch_size:
+                    new = self._newKeys(conn, conflict_columns, keys, batch)
+                    self._insertBatch(conn, insert, cols, batch, supplied)
+                    inserted += new
+                    updated += len(batch) - new if len(update_columns) else 0
+                    batch = []
+                    supplied = set(columns)
+            # end for row
+
+            # flush the partial batch
+            if len(batch):
+                new = self._newKeys(conn, conflict_columns, keys, batch)
+                self._insertBatch(conn, insert, cols, batch, supplied)
+                inserted += new
+                updated += len(batch) - new if len(update_columns) else 0
+        # end with transaction
+
+        return inserted, updated
+
+    def _newKeys(self, conn: sqlite3.Connection, conflict_columns: list, keys: list, batch: list) -> int:
+        """
+        Works out how many rows of an upsert batch will be inserted rather than update an existing row - the first row
+        with each conflict key not in the table yet.  Keys with a null never conflict, so those rows are always new.
+        :param conn: The connection the upsert is running on, so the earlier batches are seen.
+        :param conflict_columns: The columns of the unique key.
+        :param keys: The positions of the conflict columns in the parameter lists.
+        :param batch: A list of parameter lists, one per row.
+        :return: The number of rows which will be inserted.
+        """
+        found = [tuple(vals[k] for k in keys) for vals in batch]
+        distinct = list(dict.fromkeys(f for f in found if None not in f))
+        new = len(found) - sum(1 for f in found if None not in f) + len(distinct)
+
+        if len(distinct):
+            row = f"({', '.join(['?'] * len(keys))})"
+            on = ' and '.join([f'{self.TableName}.{c} = k.column{i + 1}' for i, c in enumerate(conflict_columns)])
+            query = f"Select count(*) From (Values {', '.join([row] * len(distinct))}) k Join {self.TableName} On {on}"
+            new -= conn.execute(query, [v for key in distinct for v in key]).fetchone()[0]
+
+        return new
 
     def UpdateValue(self, name: str, value: typing.Any, compname: str = '', operator: ComparisonOps = ComparisonOps.Noop
                     , compval: typing.Any = None):
@@ -288,6 +1294,7 @@ class Table:
         """
         # TODO make the where clause a list of tuples or actual where objects?
 
+        timer = self._startTimer('UpdateValue')
         params = [value]  # this will be the second arg with the order parameters into the query
 
         # verify the column
@@ -296,22 +1303,96 @@ class Table:
         # verify the value is legal
         self._hook_ValidateColumn(name, value)
 
-        # create the base update statement
-        # make sure to wrap text values in ""
-        update = self._hook_BuildBaseQuery('update', [name])
-
-        # if there is an operator we have an in-line filter
+        # build the update statement, if there is an operator we have an in-line filter, otherwise use the filters
         if operator != ComparisonOps.Noop:
-            update, params = self._hook_InLineFilter(update, params, compname, operator, compval)
-
-        # nothing inline, use the filters
+            update, params = self._buildQuery('update', [name], params, (compname, operator, compval))
         else:
-            update, params = self._hook_ApplyFilters(update, params)
+            update, params = self._buildQuery('update', [name], params)
+        timer.Mark('build')
 
         # perform the action
-        cur = self._client.cursor()
-        cur.execute(update, params)
-        self._client.commit()
+        with self._pool.Checkout() as conn, self._execute(conn, update, params) as cur:
+            timer.Mark('execute')
+            self._pool.Commit(conn)
+            timer.Mark('commit')
+
+        self._invalidate()
+        timer.Done(cur.rowcount)
+
+    def UpdateMany(self, rows: typing.Iterable, key_column: str, columns: list = None, batch_size: int = 1000) -> int:
+        """
+        Updates a set of rows, each with its own values for several columns, picked out by the value of a key column.
+        The rows go through one prepared update per set of columns, sent in batches and all inside one transaction.
+        Every value is validated before its batch is sent.
+
+        :param rows: An iterable of either maps of column names and values, or tuples of values.  Each holds the key
+        and the new values of the columns to set, the columns not in it are left alone.
+        :param key_column: The column which picks out the row to update (ie - the primary key).
+        :param columns: The column names matching the positions in tuple rows, including the key column.
+        :param batch_size: The number of rows to send in each executemany call.
+        :return: The number of rows updated.
+        """
+        self._hook_CheckColumn(key_column)
+        if columns is not None:
+            for c in columns:
+                self._hook_CheckColumn(c)
+            if key_column not in columns:
+                raise ValueError(f'{self.TableName}: the columns need to include the key {key_column}')
+
+        timer = self._startTimer('UpdateMany')
+        updated = 0
+        with self._pool.Transaction() as conn:
+            shape = None  # the columns set by the rows in the batch
+            batch = []
+            for row in rows:
+                if isinstance(row, dict):
+                    if key_column not in row:
+                        raise ValueError(f'{self.TableName}: row is missing the key {key_column}')
+                    cols = tuple(c for c in row.keys() if c != key_column)
+                    vals = [row[c] for c in cols]
+                    vals.append(row[key_column])
+                else:
+                    if columns is None:
+                        raise ValueError(f'{self.TableName}: tuple rows need the columns to be named')
+                    cols = tuple(c for c in columns if c != key_column)
+                    vals = [row[columns.index(c)] for c in cols]
+                    vals.append(row[columns.index(key_column)])
+
+                if len(cols) == 0:
+                    raise ValueError(f'{self.TableName}: row has no columns to update')
+
+                # a new set of columns needs a different statement
+                if cols != shape or len(batch) >= batch_size:
+                    if len(batch):
+                        updated += self._updateBatch(conn, shape, key_column, batch)
+                    shape = cols
+                    batch = []
+
+                batch.append(vals)
+            # end for row
+
+            # flush the partial batch
+            if len(batch):
+                updated += self._updateBatch(conn, shape, key_column, batch)
+            timer.Mark('execute')
+        # end with transaction
+        timer.Mark('commit')
+
+        self._invalidate()
+        timer.Done(updated)
+        return updated
+
+    def _updateBatch(self, conn: sqlite3.Connection, cols: tuple, key_column: str, batch: list) -> int:
+        """
+        Validates one batch of UpdateMany rows, then sends it through the prepared update.
+        :return: The number of rows updated.
+        """
+        for c in cols:
+            self._hook_CheckColumn(c)
+        self._validateBatch(cols + (key_column,), batch, cols + (key_column,))
+
+        update, _ = self._buildQuery('update', cols, [], (key_column, ComparisonOps.EQUALS, batch[0][-1]))
+        return conn.executemany(update, batch).rowcount
 
     def Delete(self, name: str = None, operator: ComparisonOps = ComparisonOps.Noop, value: typing.Any = None):
         """
@@ -324,6 +1405,7 @@ class Table:
         """
         # TODO make the where clause a list of tuples or actual where objects?
 
+        timer = self._startTimer('Delete')
         params = []  # this will be the second arg with the order parameters into the query
 
         # This is probably not needed since testing shows param'd queries accept None
@@ -333,45 +1415,239 @@ class Table:
 #        else:
 #            val = value
 
-        # start the delete statement
-        delete = self._hook_BuildBaseQuery('delete')
-
-        # if there is an operator we have an in-line filter
+        # build the delete statement, if there is an operator we have an in-line filter, otherwise use the filters
         if operator != ComparisonOps.Noop:
-#            delete, params = self._hook_InLineFilter(delete, params, name, operator, val)
-            delete, params = self._hook_InLineFilter(delete, params, name, operator, value)
-
-        # nothing inline, use the filters
+            delete, params = self._buildQuery('delete', [], params, (name, operator, value))
         else:
-            delete, params = self._hook_ApplyFilters(delete, params)
+            delete, params = self._buildQuery('delete', [], params)
+        timer.Mark('build')
 
         # perform the action
-        cur = self._client.cursor()
-        try:
-            cur.execute(delete, params)
-            self._client.commit()
-        except sqlite3.OperationalError:
-            print(delete)
+        with self._pool.Checkout() as conn:
+            try:
+                with self._execute(conn, delete, params) as cur:
+                    timer.Mark('execute')
+                    self._pool.Commit(conn)
+                    timer.Mark('commit')
+            except sqlite3.OperationalError:
+                print(delete)
+                return
+
+        self._invalidate()
+        timer.Done(cur.rowcount)
+
+    def Explain(self, columns: list) -> list:
+        """
+        Shows how sqlite will run the query Get builds for a set of columns with the current filters.
+
+        :param columns: A list of the column names to select.
+        :return: The detail lines of the query plan, ie - 'SCAN Person' or 'SEARCH Person USING INDEX ...'.
+        """
+        params = []
+
+        # sanity check the columns
+        for c in columns:
+            self._hook_CheckColumn(c)
+        # end for c
+
+        query, params = self._buildQuery('select', columns, params)
+
+        with self._pool.Checkout() as conn, self._inLists(conn, params) as params:
+            return [row[3] for row in conn.execute(f'explain query plan {query}', params)]
+
+    #endregion
+
+    #region Aggregates
+
+    def Count(self, column: str = None) -> int:
+        """
+        Counts the rows matching the filters, without reading them.
+        :param column: Only count the rows where this column isn't null, all of them if None.
+        :return: The number of rows.
+        """
+        return self._aggregate('Count', 'count', '*' if column is None else column)
+
+    def Sum(self, column: str) -> typing.Any:
+        """
+        Adds up a column over the rows matching the filters.
+        :return: The total, None if there are no (non-null) values.
+        """
+        return self._aggregate('Sum', 'sum', column)
+
+    def Min(self, column: str) -> typing.Any:
+        """
+        Finds the smallest value of a column over the rows matching the filters.
+        :return: The value, None if there are no (non-null) values.
+        """
+        return self._aggregate('Min', 'min', column)
+
+    def Max(self, column: str) -> typing.Any:
+        """
+        Finds the largest value of a column over the rows matching the filters.
+        :return: The value, None if there are no (non-null) values.
+        """
+        return self._aggregate('Max', 'max', column)
+
+    def Avg(self, column: str) -> typing.Optional[float]:
+        """
+        Averages a column over the rows matching the filters, nulls are left out.
+        :return: The average, None if there are no (non-null) values.
+        """
+        return self._aggregate('Avg', 'avg', column)
+
+    def GroupBy(self, columns: list, aggregates: list) -> list:
+        """
+        Splits the rows matching the filters into groups with the same values in a set of columns, and works out the
+        aggregates for each group, ie - GroupBy(['lname'], [('count', '*'), ('max', 'birthday')]).
+
+        :param columns: The columns to group by.
+        :param aggregates: A list of (function, column) pairs.  The functions are count, sum, total, min, max, and avg,
+        and the column for count can be '*'.
+        :return: One row per group, sorted by the group columns, holding the group values then the aggregates.
+        """
+        timer = self._startTimer('GroupBy')
+
+        columns = [self._normalizeColumn(c) for c in columns]
+        exprs = columns + [self._aggregateExpr(func, col) for func, col in aggregates]
+
+        query, params = self._buildQuery('select', exprs, [], order=tuple((c, False) for c in columns),
+                                         group=tuple(columns))
+        timer.Mark('build')
+
+        rows = self._fetchAll(query, params, exprs, timer)
+
+        timer.Done(len(rows))
+        return rows
+
+    def _aggregateExpr(self, func: str, column: str) -> str:
+        """
+        Checks an aggregate function and its column, and builds the sql for it.
+        """
+        func = func.lower()
+        if func not in self.__AGGREGATES:
+            raise ValueError(f'{self.TableName}: {func} is not one of {", ".join(self.__AGGREGATES)}')
+
+        if column == '*' and func == 'count':
+            return 'count(*)'
+        return f'{func}({self._normalizeColumn(column)})'
+
+    def _aggregate(self, operation: str, func: str, column: str) -> typing.Any:
+        """
+        Runs a single aggregate over the rows matching the filters.
+        """
+        timer = self._startTimer(operation)
+
+        expr = self._aggregateExpr(func, column)
+        # the order makes no difference to one row
+        query, params = self._buildQuery('select', [expr], [], order=())
+        timer.Mark('build')
+
+        with self._pool.Checkout() as conn, self._execute(conn, query, params) as cur:
+            timer.Mark('execute')
+            value = cur.fetchone()[0]
+            timer.Mark('fetch')
+
+        timer.Done(1)
+        return value
 
     #endregion
 
     #region Infrastructure
 
-    def Filter(self, name: str, operator: ComparisonOps, value: typing.Any):
+    def Instrument(self, instrumentation: typing.Optional[Instrumentation] = None) -> Instrumentation:
+        """
+        Starts recording the timings of every Get, Add, UpdateValue and Delete on this table.  Several tables can share
+        one Instrumentation to see them side by side.
+
+        :param instrumentation: Where to record the timings, a new one is made if not given.
+        :return: The instrumentation in use.
+        """
+        self._instr = Instrumentation() if instrumentation is None else instrumentation
+        return self._instr
+
+    def StopInstrumenting(self):
+        """
+        Stops recording the timings.
+        """
+        self._instr = None
+
+    def _startTimer(self, operation: str):
+        # when off, the operations get a timer which does nothing
+        if self._instr is None:
+            return NULL_TIMER
+        return self._instr.Start(self.TableName, operation)
+
+    def UseRecords(self, enabled: bool = True):
+        """
+        Switches the rows returned by Get, GetAll, Iter and IterAll from plain tuples to records, which also allow
+        access to the values by column name (ie - row.fname).  The records are tuples underneath, so they cost the same
+        memory and still index, unpack and compare like before.  Column names which aren't valid python names have the
+        bad characters replaced with _ (ie - Person.fname becomes Person_fname in a JoinedTable).
+
+        :param enabled: True to return records, False to go back to tuples.
+        """
+        # the cached rows are the old kind
+        self.ClearResultCache()
+
+        if enabled:
+            self._records = {}
+            # the class for all the columns is built now, any others the first time they are asked for
+            self._rowFactory(list(self._columns.keys()))
+        else:
+            self._records = None
+
+    def _rowFactory(self, columns: list) -> typing.Optional[typing.Callable]:
         """
-        Adds a filter to the system which will restrict results to only those which meet the criteria.
-        :param name: The name of the column to filter on.
+        Finds (or makes) the cursor row_factory for a list of columns.
+        :return: The factory, or None for plain tuples.
+        """
+        if self._records is None:
+            return None
+
+        key = tuple(columns)
+        factory = self._records.get(key)
+        if factory is None:
+            names = [re.sub(r'\W|^(?=\d)', '_', c) for c in columns]
+            record = namedtuple(re.sub(r'\W', '_', f'{self.TableName}Row'), names, rename=True)
+            make = record._make
+            factory = lambda cur, row: make(row)
+            self._records[key] = factory
+
+        return factory
+
+    def WarnOnScan(self, threshold: typing.Optional[int] = 10000):
+        """
+        Turns on warnings (through the logging module) for queries which scan a whole table holding more than threshold
+        rows.  Each distinct query's plan is only read the first time it is run, the tables it scans are checked
+        against the threshold every time.  The rows are estimated from sqlite_stat1 or the largest rowid rather than
+        counted.
+
+        :param threshold: The number of rows a table can hold before a scan of it is a problem, None turns the warnings
+        off.
+        """
+        self._scanThreshold = threshold
+        self._planScans.clear()
+
+    def Filter(self, name: typing.Union[str, Where, And, Not], operator: ComparisonOps = ComparisonOps.Noop,
+               value: typing.Any = None):
+        """
+        Adds a filter to the system which will restrict results to only those which meet the criteria.  Instead of a
+        column name this can also take a whole expression, made of Where entries joined with And, Or, and Not.  IN
+        takes a list of values, and BETWEEN a pair, ie - Filter('id', ComparisonOps.IN, [1, 2, 3]) or
+        Filter(Or(Where('lname', ComparisonOps.EQUALS, 'Doe'), Not(Where('id', ComparisonOps.BETWEEN, (2, 6))))).
+        :param name: The name of the column to filter on, or a filter expression.
         :param operator: How the value is applied.
         :param value: The threshold or matching value to filter based on.
         """
 
-        # verify the column
-        name = self._normalizeColumn(name)
-
-        # TODO verify the operation is valid for the column type
+        # build the data instance
+        if isinstance(name, str):
+            clause = Where(column=name, operator=operator, value=value)
+        else:
+            clause = name
 
-        # verify the value is the correct type
-        self._hook_ValidateColumn(name, value)
+        # verify the columns and values
+        clause = self._checkFilter(clause)
 
         # Don't think we need this - tested with param'd queries and None is accepted in several cases
 #        if value is None:
@@ -379,19 +1655,38 @@ class Table:
 #        else:
 #            val = value
 
-        # build the data instance
-#        clause = Where(column=name, operator=operator, value=val)
-        clause = Where(column=name, operator=operator, value=value)
-
         # add the filter
         self._filters.append(clause)
 
+    def Transaction(self) -> typing.ContextManager[sqlite3.Connection]:
+        """
+        Groups the operations inside a with block into a single transaction.  None of the operations commit on their
+        own, everything is committed when the block exits, or rolled back if it raises.  Nested blocks become
+        savepoints.  The transaction covers every table sharing this table's connections.
+        """
+        return self._pool.Transaction()
+
     def ClearFilters(self):
         """
         Removes all the filters on the data.
         """
         self._filters.clear()
 
+    def OrderBy(self, name: str, descending: bool = False):
+        """
+        Adds a column to sort the results of Get, GetAll, Iter and IterAll by.  Each call adds a column after the ones
+        already set, which only break ties in them.
+        :param name: The name of the column to sort by.
+        :param descending: Sorts high to low instead.
+        """
+        self._order.append((self._normalizeColumn(name), descending))
+
+    def ClearOrder(self):
+        """
+        Removes the sorting, the results come back in whatever order sqlite finds them.
+        """
+        self._order.clear()
+
     def UpdateValidators(self, name: str, checker: type(len)):
         """
         Changes the validator for a given column.
@@ -405,6 +1700,43 @@ class Table:
 
         self._columns[name].Set_Validator(checker)
 
+    def ValidateRows(self, rows: typing.Sequence, columns: list = None) -> dict:
+        """
+        Checks a set of rows against the column validators without stopping at the first problem.  The rows are checked
+        a column at a time, see Column.ValidateMany.
+
+        :param rows: A list of either maps of column names and values, or tuples of values.
+        :param columns: The column names matching the positions in tuple rows.  Defaults to all the columns.
+        :return: Map of the position of each bad row to the names of the columns which failed, empty if all are good.
+        """
+        if columns is None:
+            columns = list(self._columns.keys())
+        else:
+            for c in columns:
+                self._hook_CheckColumn(c)
+
+        failures = {}
+        vectors = {}
+
+        # pull the rows apart into columns, remembering which rows had a value for each one
+        for i, row in enumerate(rows):
+            if isinstance(row, dict):
+                items = row.items()
+            else:
+                items = zip(columns, row)
+            for c, v in items:
+                self._hook_CheckColumn(c)
+                ndx, vals = vectors.setdefault(c, ([], []))
+                ndx.append(i)
+                vals.append(v)
+        # end for rows
+
+        for c, (ndx, vals) in vectors.items():
+            for f in self._columns[c].ValidateMany(vals):
+                failures.setdefault(ndx[f], []).append(c)
+
+        return dict(sorted(failures.items()))
+
     def SetDefault(self, name: str, value: typing.Any):
         """
         Changes the value of the default value for the given column.
@@ -427,6 +1759,8 @@ class Table:
         Converts a create statement into a data structure (format still TBD)
         :return: A tuple of the table name and the data structure.
         """
+        from sqlparse import engine, tokens as Token
+
         tdata = {}
         stack = engine.FilterStack()
         # returns a generator to the list of tokens
@@ -477,6 +1811,14 @@ class Table:
     def IsValid(self):
         return self._valid
 
+    @property
+    def Pool(self) -> ConnectionPool:
+        return self._pool
+
+    @property
+    def Indexes(self) -> list:
+        return list(self._indexes)
+
     def Build_SQL(self):
         """
         Creates a SQL statement which would build this table as is.
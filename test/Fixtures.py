@@ -99,3 +99,26 @@ def config():
     file = 'test.ini'
     cp.read(file)
     return cp
+
+@pytest.fixture
+def iniFile(tmp_path):
+    """
+    Writes an ini file for a database in a temporary folder, so the Database tests start from an empty file.
+    """
+    ini = tmp_path / 'db.ini'
+    ini.write_text(f"""[global]
+file = {tmp_path / 'db.sqlite'}
+poolsize = 3
+
+[Person]
+id = integer, key
+fname = text, required
+lname = text, required
+nickname = text
+
+[Wallet]
+id = integer, key
+personid = integer
+amount = real
+""")
+    return str(ini)
@@ -1,9 +1,12 @@
 # grab the setup for the DB from here
 from Fixtures import *
 
+import math
+
 from Tables import Table
 from JoinedTable import JoinedTable
 from Tables import ComparisonOps
+from Definitions import Where, Or
 import Errors
 
 
@@ -139,6 +142,121 @@ def test_Get_DNE_Column(config, buildDBFile):
         data = t.Get(["id, name, lname"])
 
 
+def test_Iter_Filtered(config, buildDBFile):
+    per = Table(config["Person"], buildDBFile)
+    bifold = Table(config["Wallet"], buildDBFile)
+
+    jt = JoinedTable(per, bifold, "id", "personid")
+    jt.Filter("Wallet.amount", ComparisonOps.GREATER, 500.0)
+
+    data = list(jt.Iter(["Person.fname", "Wallet.amount"], chunk_size=1))
+
+    assert data == [("June", 654.85), ("John", 1010.12)]
+
+
+def test_Explain(config, buildDBFile):
+    per = Table(config["Person"], buildDBFile)
+    bifold = Table(config["Wallet"], buildDBFile)
+
+    jt = JoinedTable(per, bifold, "id", "personid")
+    plan = jt.Explain(["Person.fname", "Wallet.amount"])
+
+    # one line for each side of the join
+    assert len(plan) == 2
+    assert 'Person' in plan[0]
+    assert 'Wallet' in plan[1]
+
+
+def test_GetColumns(config, buildDBFile):
+    per = Table(config["Person"], buildDBFile)
+    bifold = Table(config["Wallet"], buildDBFile)
+
+    jt = JoinedTable(per, bifold, "id", "personid")
+    data = jt.GetColumns(['Person.fname', 'Wallet.amount', 'Wallet.id'], chunk_size=2)
+
+    # reals keep their array with nan for the nulls, integers fall back to a list
+    assert data['Wallet.amount'].typecode == 'd'
+    assert data['Wallet.amount'][0] == 100.0
+    assert math.isnan(data['Wallet.amount'][2])
+    assert data['Wallet.id'] == [1, 2, None, None, None, 3, None]
+
+
+def test_UseRecords(config, buildDBFile):
+    per = Table(config["Person"], buildDBFile)
+    bifold = Table(config["Wallet"], buildDBFile)
+
+    jt = JoinedTable(per, bifold, "id", "personid")
+    jt.UseRecords()
+    data = jt.Get(["Person.fname", "Wallet.amount"])
+
+    assert data[1].Person_fname == "June"
+    assert data[1].Wallet_amount == 654.85
+
+
+def test_ResultCache_Invalidate(config, buildDBFile, dirtyDB):
+    per = Table(config["Person"], buildDBFile)
+    bifold = Table(config["Wallet"], buildDBFile)
+
+    jt = JoinedTable(per, bifold, "id", "personid")
+    jt.CacheResults()
+
+    jt.Filter("Person.fname", ComparisonOps.EQUALS, "John")
+    before = jt.Get(["Wallet.amount"])
+    assert jt.Get(["Wallet.amount"]) == before
+    assert jt.ResultCacheHits == 1
+
+    # writes to either side clear the join's results
+    bifold.UpdateValue("amount", 1.5, "personid", ComparisonOps.EQUALS, 6)
+    assert jt.Get(["Wallet.amount"]) == [(1.5,)] * len(before)
+
+    per.CacheResults()
+    assert len(per.GetAll()) == 7
+    per.Add({"fname": "John", "lname": "Joined"})
+    assert len(jt.Get(["Wallet.amount"])) == len(before) + 1
+
+    # and writes through the join clear the primary's
+    jt.ClearFilters()
+    jt.Delete("Person.lname", ComparisonOps.EQUALS, "Joined")
+    assert len(per.GetAll()) == 7
+    assert jt.ResultCacheHits == 1
+
+
+def test_GetPage(config, buildDBFile):
+    per = Table(config["Person"], buildDBFile)
+    bifold = Table(config["Wallet"], buildDBFile)
+
+    jt = JoinedTable(per, bifold, "id", "personid")
+
+    first = jt.GetPage(["Person.fname", "Wallet.amount"], "Person.fname", size=4)
+    assert [r[0] for r in first] == ["Jack", "Jane", "Jill", "Joanna"]
+    assert first[0][1] is None
+
+    # unqualified names fall back to the primary table
+    rest = jt.GetPage(["Person.fname", "Wallet.amount"], "fname", after=first[-1][0], size=4)
+    assert rest == [("Joe", 100.0), ("John", 1010.12), ("June", 654.85)]
+
+    jt.OrderBy("Wallet.amount", descending=True)
+    assert jt.Get(["Person.fname"])[0] == ("John",)
+
+
+def test_Aggregates(config, buildDBFile):
+    per = Table(config["Person"], buildDBFile)
+    bifold = Table(config["Wallet"], buildDBFile)
+
+    jt = JoinedTable(per, bifold, "id", "personid")
+
+    assert jt.Count() == 7
+    assert jt.Count("Wallet.amount") == 3
+    assert jt.Max("Wallet.amount") == 1010.12
+
+    jt.Filter("Person.lname", ComparisonOps.EQUALS, "Smith")
+    assert jt.Sum("Wallet.amount") == 754.85
+
+    jt.ClearFilters()
+    groups = jt.GroupBy(["lname"], [("count", "Wallet.amount"), ("total", "Wallet.amount")])
+    assert groups == [("Dane", 0, 0.0), ("Doe", 1, 1010.12), ("Smith", 2, 754.85)]
+
+
 # endregion
 
 
@@ -220,4 +338,16 @@ def test_Filter_InvalidValue(config, buildDBFile):
     # just to be safe
     jt.ClearFilters()
 
+
+def test_Filter_Expression(config, buildDBFile):
+    per = Table(config["Person"], buildDBFile)
+    bifold = Table(config["Wallet"], buildDBFile)
+
+    jt = JoinedTable(per, bifold, "id", "personid")
+
+    # unqualified names inside the expression fall back to the primary table too
+    jt.Filter(Or(Where("fname", ComparisonOps.IN, ["Jack", "Jill"]),
+                 Where("Wallet.amount", ComparisonOps.BETWEEN, (500.0, 1000.0))))
+    assert jt.Get(["Person.fname", "Wallet.amount"]) == [("June", 654.85), ("Jack", None), ("Jill", None)]
+
 # endregion
\ No newline at end of file
@@ -0,0 +1,119 @@
+# grab the setup for the DB from here
+from Fixtures import *
+
+import asyncio
+import time
+
+from Database import Database
+from AsyncTable import AsyncTable
+from Tables import ComparisonOps
+from Definitions import Where, Or
+import Errors
+
+
+def test_Async_AddAndGet(iniFile):
+    db = Database(iniFile)
+    person = AsyncTable(db.GetTable('Person'), max_pending=2)
+
+    async def work():
+        # more requests than the queue allows at once, they should all still go through in order
+        await asyncio.gather(*[person.Add({'fname': f'A{i}', 'lname': 'Async'}) for i in range(10)])
+        assert await person.AddMany([('B', 'Async')] * 5, columns=['fname', 'lname']) == 5
+
+        await person.UpdateValue('nickname', 'nick', 'fname', ComparisonOps.EQUALS, 'A3')
+        await person.Delete('fname', ComparisonOps.EQUALS, 'B')
+
+        await person.Filter('nickname', ComparisonOps.EQUALS, 'nick')
+        data = await person.Get(['fname'])
+        await person.ClearFilters()
+
+        everything = await person.GetAll()
+        await person.Close()
+        return data, everything
+
+    data, everything = asyncio.run(work())
+
+    assert data == [('A3',)]
+    assert [r[1] for r in everything] == [f'A{i}' for i in range(10)]
+
+    db.Close()
+
+
+def test_Async_Iter(iniFile):
+    db = Database(iniFile)
+    db.GetTable('Person').AddMany([(f'I{i}', 'Iter') for i in range(25)], columns=['fname', 'lname'])
+    person = AsyncTable(db.GetTable('Person'))
+
+    async def work():
+        names = [r[0] async for r in person.Iter(['fname'], chunk_size=4)]
+        await person.Close()
+        return names
+
+    assert asyncio.run(work()) == [f'I{i}' for i in range(25)]
+
+    db.Close()
+
+
+def test_Async_Close(iniFile):
+    db = Database(iniFile)
+    db.GetTable('Person').AddMany([(f'C{i}', 'Close') for i in range(10)], columns=['fname', 'lname'])
+    person = AsyncTable(db.GetTable('Person'))
+
+    async def work():
+        # a stream still open when the worker stops is left alone
+        rows = person.Iter(['fname'], chunk_size=4)
+        first = await rows.__anext__()
+
+        # the wait for the queued work doesn't hold up the loop
+        slow = asyncio.ensure_future(person._run(time.sleep, 0.5))
+        await asyncio.sleep(0)
+        closing = asyncio.ensure_future(person.Close())
+        start = time.monotonic()
+        await asyncio.sleep(0.01)
+        gap = time.monotonic() - start
+        await asyncio.gather(slow, closing)
+
+        await rows.aclose()
+        return first, gap
+
+    first, gap = asyncio.run(work())
+    assert first == ('C0',)
+    assert gap < 0.25
+
+    db.Close()
+
+
+def test_Async_Errors(iniFile):
+    db = Database(iniFile)
+    person = AsyncTable(db.GetTable('Person'))
+
+    async def work():
+        with pytest.raises(Errors.ImaginaryColumn):
+            await person.Get(['name'])
+        await person.Close()
+
+    asyncio.run(work())
+    db.Close()
+
+
+def test_Async_SharedPool(iniFile):
+    # the ini file's pool has 3 connections, more wrappers than that can't each keep one
+    db = Database(iniFile)
+    table = db.GetTable('Person')
+    table.Add({'fname': 'Sync', 'lname': 'Shared'})
+    wrappers = [AsyncTable(table) for _ in range(5)]
+
+    async def work():
+        await wrappers[0].Filter(Or(Where('fname', ComparisonOps.EQUALS, 'Nobody'),
+                                    Where('lname', ComparisonOps.IN, ['Nobody', 'Else'])))
+        counts = [len(await w.GetAll()) for w in wrappers]
+        for w in wrappers:
+            await w.Close()
+        return counts
+
+    assert asyncio.run(work()) == [0, 1, 1, 1, 1]
+
+    # the wrapper's filter didn't touch the table
+    assert table.Get(['fname']) == [('Sync',)]
+
+    db.Close()
@@ -1,3 +1,5 @@
+import pytest
+
 from Columns import Column
 
 #TODO fill in more meaningful tests for
@@ -34,3 +36,64 @@ def test_Float_Validator():
     assert not c.Validate(1), 'Failed to validate 1'
     assert not c.Validate('one'), 'Incorrectly validated \"one\"'
 
+
+def test_ValidateMany_Types():
+    c = Column('id', 'integer')
+    assert c.ValidateMany([1, 2, None, 'three', 4.0, 5]) == [3, 4]
+
+    c = Column('measure', 'real')
+    assert c.ValidateMany([0.1, 1, None, 'one']) == [1, 3]
+
+    c = Column('name', 'text')
+    assert c.ValidateMany(['a', '', None, 1]) == [3]
+
+
+def test_ValidateMany_Regex():
+    c = Column('phone', r'text, required (regex: [0-9]{3}-[0-9]{4})')
+    assert c.ValidateMany(['555-1234', 'call me', 5551234, '1-555-1234']) == [1, 2]
+
+    # like the type checks, None is left to the required flag
+    assert c.ValidateMany(['555-1234', None]) == []
+    assert c.Validate(None)
+
+
+def test_ValidateMany_Custom():
+    c = Column('name', 'text')
+    c.Set_Validator(lambda v: v.startswith('J'))
+    assert c.ValidateMany(['Joe', 'Bob', 'Jane']) == [1]
+
+
+def test_Regex_Validator():
+    c = Column('phone', r'text, required (regex: ^[0-9]{3}-([0-9]{4})$)')
+    assert c.Validate('555-1234')
+    assert not c.Validate('555-12345')
+    assert not c.Validate(5551234)
+
+
+def test_Math_Validator():
+    c = Column('amount', 'real (math: x >= 0 and x < 100)')
+    assert c.Validate(0.0)
+    assert c.Validate(99.5)
+    assert not c.Validate(-0.5)
+    assert not c.Validate(100)
+    assert not c.Validate('ten')
+    assert c.ValidateMany([1.0, -1.0, 50, 200.0]) == [1, 3]
+
+
+def test_Math_Validator_Functions():
+    c = Column('delta', 'integer')
+    c.Build_Validator('math: abs(x) <= 10 and x % 2 == 0')
+    assert c.Validate(-4)
+    assert not c.Validate(3)
+    assert not c.Validate(12)
+
+
+def test_Math_Validator_Unsafe():
+    with pytest.raises(ValueError):
+        Column('amount', 'real (math: __import__("os").system("ls"))')
+
+    with pytest.raises(ValueError):
+        Column('amount', 'real (math: x.real > 0)')
+
+    with pytest.raises(ValueError):
+        Column('amount', 'real (math: y > 0)')
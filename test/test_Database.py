@@ -0,0 +1,356 @@
+# grab the setup for the DB from here
+from Fixtures import *
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import Database as Database_
+from Database import Database
+from Connections import ConnectionPool
+from Definitions import ComparisonOps
+import Errors
+
+
+# region Startup Tests
+
+def test_Create_Tables(iniFile):
+    db = Database(iniFile)
+
+    assert [t.TableName for t in db.tables] == ['Person', 'Wallet']
+    assert db.OutOfSync == []
+
+    with db.Connection() as conn:
+        names = [r[0] for r in conn.execute("select name from sqlite_master where type = 'table' order by name")]
+    assert names == ['Person', 'Wallet']
+
+    db.Close()
+
+
+def test_Create_Unique(tmp_path):
+    ini = tmp_path / 'unique.ini'
+    ini.write_text(f"""[global]
+file = {tmp_path / 'unique.sqlite'}
+
+[Tag]
+id = integer, key
+name = text, unique, required
+uses = integer
+""")
+    db = Database(str(ini))
+    tag = db.GetTable('Tag')
+
+    # the unique column is a real constraint, so it can decide an upsert
+    assert tag.Upsert([('red', 1), ('blue', 1)], ['name'], ['uses']) == (2, 0)
+    assert tag.Upsert([('red', 5), ('green', 1)], ['name'], ['uses']) == (1, 1)
+    assert tag.Get(['name', 'uses']) == [('red', 5), ('blue', 1), ('green', 1)]
+    db.Close()
+
+    db = Database(str(ini))
+    assert db.OutOfSync == []
+    db.Close()
+
+
+def test_Reopen_Existing(iniFile):
+    db = Database(iniFile)
+    db.GetTable('Person').Add({'fname': 'Joe', 'lname': 'Smith'})
+    db.Close()
+
+    db = Database(iniFile)
+    assert db.OutOfSync == []
+    assert db.GetTable('person').Get(['fname']) == [('Joe',)]
+    db.Close()
+
+
+def test_Reopen_SchemaReaders(iniFile, monkeypatch):
+    db = Database(iniFile)
+
+    # the pragmas give the same column data as parsing the creates
+    with db.Connection() as conn:
+        parsed = dict(db._parse_create(r[0]) for r in conn.execute("select sql from sqlite_master where type = 'table'"))
+        assert db._readSchema(conn) == parsed
+    db.Close()
+
+    with open(iniFile) as f:
+        original = f.read()
+    changed = original.replace('nickname = text', 'nickname = text\nage = integer')
+
+    for pragmas in [True, False]:
+        monkeypatch.setattr(Database_, '_TABLE_PRAGMAS', pragmas)
+
+        db = Database(iniFile)
+        assert db.OutOfSync == []
+        db.Close()
+
+        with open(iniFile, 'w') as f:
+            f.write(changed)
+        db = Database(iniFile)
+        assert db.OutOfSync == ['Person']
+        db.Close()
+
+        with open(iniFile, 'w') as f:
+            f.write(original)
+    # end for pragmas
+
+# endregion
+
+# region Pool Tests
+
+def test_Pool_ThreadedAdds(iniFile):
+    db = Database(iniFile)
+    person = db.GetTable('Person')
+
+    def add(i):
+        person.Add({'fname': f'T{i}', 'lname': 'Thread'})
+        return threading.get_ident()
+
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        list(ex.map(add, range(40)))
+
+    assert len(person.GetAll()) == 40
+    assert db.Pool.Opened <= db.Pool.Size
+    db.Close()
+
+
+def test_Pool_NestedCheckout(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'nested.db'), size=1)
+
+    with pool.Checkout() as outer:
+        with pool.Checkout() as inner:
+            assert inner is outer
+
+    assert pool.Opened == 1
+    pool.Close()
+
+
+def test_Pool_Exhausted(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'busy.db'), size=1, timeout=0.1)
+    errors = []
+
+    def other():
+        try:
+            with pool.Checkout():
+                pass
+        except Errors.PoolExhausted as pe:
+            errors.append(pe)
+
+    with pool.Checkout():
+        t = threading.Thread(target=other)
+        t.start()
+        t.join()
+
+    assert len(errors) == 1
+    pool.Close()
+
+
+def test_Pool_SameThread(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'owned.db'), size=2, check_same_thread=True)
+
+    with pool.Checkout() as first:
+        pass
+    with pool.Checkout() as second:
+        assert second is first
+
+    # a new thread gets its own connection
+    seen = []
+
+    def other():
+        with pool.Checkout() as conn:
+            seen.append(conn)
+
+    t = threading.Thread(target=other)
+    t.start()
+    t.join()
+    assert seen[0] is not first
+
+    # the other thread's connection was closed when it finished
+    assert pool.Opened == 1
+    pool.Close()
+
+# endregion
+
+# region Pragma Tests
+
+def test_Pragmas_Applied(tmp_path):
+    ini = tmp_path / 'wal.ini'
+    ini.write_text(f"""[global]
+file = {tmp_path / 'wal.sqlite'}
+pragma.journal_mode = WAL
+pragma.synchronous = NORMAL
+pragma.cache_size = -4000
+pragma.temp_store = MEMORY
+pragma.busy_timeout = 2500
+
+[Person]
+id = integer, key
+fname = text
+""")
+    db = Database(str(ini))
+
+    assert db.Pragmas == {'journal_mode': 'wal', 'synchronous': 1, 'cache_size': -4000, 'temp_store': 2,
+                          'busy_timeout': 2500}
+
+    # every connection gets the settings, not just the first one
+    def read():
+        with db.Connection() as conn:
+            return conn.execute('pragma busy_timeout').fetchone()[0]
+
+    with db.Connection():
+        with ThreadPoolExecutor(max_workers=1) as ex:
+            assert ex.submit(read).result() == 2500
+    assert db.Pool.Opened == 2
+
+    db.Close()
+
+
+def test_Pragmas_Invalid(tmp_path):
+    with pytest.raises(ValueError):
+        ConnectionPool(str(tmp_path / 'bad.db'), pragmas={'journal_mode': 'WAL; drop table Person'})
+
+# endregion
+
+# region Transaction Tests
+
+def test_Transaction_Commit(iniFile):
+    db = Database(iniFile)
+    person = db.GetTable('Person')
+    wallet = db.GetTable('Wallet')
+
+    with db.Transaction():
+        person.Add({'fname': 'Joe', 'lname': 'Smith'})
+        wallet.Add({'personid': 1, 'amount': 10.0})
+        person.UpdateValue('nickname', 'daddy', 'fname', ComparisonOps.EQUALS, 'Joe')
+
+        # nothing is visible from another connection until the block is done
+        assert db.Pool.InTransaction
+        with ThreadPoolExecutor(max_workers=1) as ex:
+            assert ex.submit(person.GetAll).result() == []
+
+    assert not db.Pool.InTransaction
+    assert person.GetAll() == [(1, 'Joe', 'Smith', 'daddy')]
+    assert wallet.Get(['amount']) == [(10.0,)]
+    db.Close()
+
+
+def test_Transaction_Rollback(iniFile):
+    db = Database(iniFile)
+    person = db.GetTable('Person')
+    wallet = db.GetTable('Wallet')
+
+    with pytest.raises(RuntimeError):
+        with db.Transaction():
+            person.Add({'fname': 'Joe', 'lname': 'Smith'})
+            wallet.Add({'personid': 1, 'amount': 10.0})
+            raise RuntimeError()
+
+    assert person.GetAll() == []
+    assert wallet.GetAll() == []
+    db.Close()
+
+
+def test_Transaction_Savepoint(iniFile):
+    db = Database(iniFile)
+    person = db.GetTable('Person')
+
+    with db.Transaction():
+        person.Add({'fname': 'Outer', 'lname': 'Kept'})
+
+        with pytest.raises(RuntimeError):
+            with person.Transaction():
+                person.Add({'fname': 'Inner', 'lname': 'Lost'})
+                raise RuntimeError()
+
+        with person.Transaction():
+            person.Add({'fname': 'Inner', 'lname': 'Kept'})
+
+    assert person.Get(['fname', 'lname']) == [('Outer', 'Kept'), ('Inner', 'Kept')]
+    db.Close()
+
+
+def test_Transaction_ResultCache(iniFile):
+    db = Database(iniFile)
+    person = db.GetTable('Person')
+    person.Add({'fname': 'A', 'lname': 'Cached'})
+    person.CacheResults()
+
+    # rows read inside a rolled back transaction are never served afterwards
+    with pytest.raises(RuntimeError):
+        with db.Transaction():
+            person.Add({'fname': 'C', 'lname': 'Cached'})
+            assert person.Get(['fname']) == [('A',), ('C',)]
+            raise RuntimeError()
+    assert person.Get(['fname']) == [('A',)]
+    assert person.Get(['fname']) == [('A',)]
+
+    # a reader on another thread caches what it saw before the commit, the commit makes that stale
+    with db.Transaction():
+        person.Add({'fname': 'B', 'lname': 'Cached'})
+        with ThreadPoolExecutor(max_workers=1) as ex:
+            assert ex.submit(person.Get, ['fname']).result() == [('A',)]
+    assert person.Get(['fname']) == [('A',), ('B',)]
+
+    db.Close()
+
+# endregion
+
+# region Index Tests
+
+INDEXED_INI = """[global]
+file = {file}
+
+[Person]
+id = integer, key
+fname = text, required
+lname = text, required
+ssn = integer
+nickname = text
+index.ix_person_name = lname, fname
+index.ux_person_ssn = unique ssn
+index.ix_person_nick = {nick}
+"""
+
+
+def writeIndexed(tmp_path, nick: str = 'nickname where nickname is not null') -> str:
+    ini = tmp_path / 'indexed.ini'
+    ini.write_text(INDEXED_INI.format(file=tmp_path / 'indexed.sqlite', nick=nick))
+    return str(ini)
+
+
+def test_Index_Created(tmp_path):
+    db = Database(writeIndexed(tmp_path))
+
+    with db.Connection() as conn:
+        found = {r[0]: r[1] for r in conn.execute("select name, sql from sqlite_master where type = 'index'")}
+        plan = conn.execute("explain query plan select fname from Person where lname = 'Doe'").fetchall()
+
+    assert sorted(found.keys()) == ['ix_person_name', 'ix_person_nick', 'ux_person_ssn']
+    assert 'unique' in found['ux_person_ssn'].lower()
+    assert 'where nickname is not null' in found['ix_person_nick'].lower()
+    assert 'ix_person_name' in plan[0][3]
+
+    person = db.GetTable('Person')
+    assert [i.Name for i in person.Indexes] == ['ix_person_name', 'ux_person_ssn', 'ix_person_nick']
+    db.Close()
+
+
+def test_Index_Drift(tmp_path):
+    db = Database(writeIndexed(tmp_path))
+    db.Close()
+
+    # reopening with the same ini is clean
+    db = Database(writeIndexed(tmp_path))
+    assert db.IndexDrift == []
+    assert db.OutOfSync == []
+    db.Close()
+
+    # now change one of the definitions
+    db = Database(writeIndexed(tmp_path, 'nickname, fname'))
+    assert db.IndexDrift == ['ix_person_nick']
+    assert db.OutOfSync == ['Person']
+    db.Close()
+
+
+def test_Index_BadColumn(tmp_path):
+    with pytest.raises(Errors.ImaginaryColumn):
+        Database(writeIndexed(tmp_path, 'nick'))
+
+# endregion
@@ -0,0 +1,58 @@
+# grab the setup for the DB from here
+from Fixtures import *
+
+from Tables import Table
+from JoinedTable import JoinedTable
+from Tables import ComparisonOps
+from Instrumentation import Instrumentation, Histogram
+
+
+def test_Histogram_Percentiles():
+    h = Histogram()
+    for i in range(99):
+        h.Add(0.000010)  # 10 us
+    h.Add(0.5)
+
+    assert h.Count == 100
+    assert h.Max == 0.5
+    # buckets are powers of two, so 10us lands in the 16us bucket
+    assert h.Percentile(50) == 16 / 1e6
+    assert h.Percentile(99) == 16 / 1e6
+    assert h.Percentile(100) == 0.5
+
+
+def test_Instrument_Table(config, buildDBFile, dirtyDB):
+    samples = []
+    t = Table(config["Person"], buildDBFile)
+    instr = t.Instrument(Instrumentation(samples.append))
+
+    t.GetAll()
+    t.Add({'fname': 'Timed', 'lname': 'Call'})
+    t.UpdateValue('nickname', 'tc', 'fname', ComparisonOps.EQUALS, 'Timed')
+    t.Delete('fname', ComparisonOps.EQUALS, 'Timed')
+
+    assert [(s.operation, s.rows) for s in samples] == [('Get', 7), ('Add', 1), ('UpdateValue', 1), ('Delete', 1)]
+    assert samples[0].fetch > 0
+    assert samples[0].commit == 0
+    assert samples[1].commit > 0
+
+    stats = instr.Stats()
+    assert stats[('Person', 'Get')]['calls'] == 1
+    assert stats[('Person', 'Get')]['rows'] == 7
+    assert instr.Histogram('Person', 'Delete', 'execute').Count == 1
+
+    # once stopped nothing else is recorded
+    t.StopInstrumenting()
+    t.GetAll()
+    assert len(samples) == 4
+
+
+def test_Instrument_JoinedTable(config, buildDBFile):
+    per = Table(config["Person"], buildDBFile)
+    bifold = Table(config["Wallet"], buildDBFile)
+
+    jt = JoinedTable(per, bifold, "id", "personid")
+    instr = jt.Instrument()
+    jt.Get(["Person.fname", "Wallet.amount"])
+
+    assert instr.Stats()[('Person/Wallet', 'Get')]['rows'] == 7
@@ -0,0 +1,174 @@
+# grab the setup for the DB from here
+from Fixtures import *
+
+from Database import Database
+from JoinChain import JoinChain
+from Definitions import ComparisonOps, Where, Or
+import Errors
+
+
+@pytest.fixture
+def chainDB(tmp_path):
+    """
+    A database of people, their addresses, and the cities those are in, for the join chain tests.  The last person
+    has no address, and the last address has no city.
+    """
+    ini = tmp_path / 'chain.ini'
+    ini.write_text(f"""[global]
+file = {tmp_path / 'chain.sqlite'}
+
+[Person]
+id = integer, key
+fname = text, required
+
+[Address]
+id = integer, key
+personid = integer
+street = text
+cityid = integer
+
+[City]
+id = integer, key
+name = text, required
+""")
+    db = Database(str(ini))
+    db.GetTable('City').AddMany([('Springfield',), ('Shelbyville',)], columns=['name'])
+    db.GetTable('Person').AddMany([('Homer',), ('Marge',), ('Lisa',), ('Ned',)], columns=['fname'])
+    db.GetTable('Address').AddMany([(1, '742 Evergreen', 1), (2, '742 Evergreen', 1), (3, '1 Lake Dr', 2),
+                                    (3, '2 Nowhere', None)], columns=['personid', 'street', 'cityid'])
+    yield db
+    db.Close()
+
+
+# region Get Tests
+
+def test_Chain_Left(chainDB):
+    person = chainDB.GetTable('Person')
+    chain = person.Join(chainDB.GetTable('Address'), 'personid', 'id') \
+        .Join(chainDB.GetTable('City'), 'id', 'Address.cityid')
+
+    assert chain.TableName == 'Person/Address/City'
+    assert isinstance(chain, JoinChain)
+
+    chain.OrderBy('Person.id')
+    chain.OrderBy('Address.id')
+    data = chain.Get(['Person.fname', 'Address.street', 'City.name'])
+    assert data == [('Homer', '742 Evergreen', 'Springfield'), ('Marge', '742 Evergreen', 'Springfield'),
+                    ('Lisa', '1 Lake Dr', 'Shelbyville'), ('Lisa', '2 Nowhere', None), ('Ned', None, None)]
+
+    # every column of every table in the chain
+    assert len(chain.GetAll()[0]) == 8
+    assert chain.Count('City.name') == 3
+
+
+def test_Chain_Inner(chainDB):
+    chain = JoinChain(chainDB.GetTable('Person')) \
+        .Join(chainDB.GetTable('Address'), 'personid', 'Person.id', inner=True) \
+        .Join(chainDB.GetTable('City'), 'id', 'cityid', inner=True)
+
+    chain.Filter(Or(Where('City.name', ComparisonOps.EQUALS, 'Shelbyville'),
+                    Where('fname', ComparisonOps.EQUALS, 'Ned')))
+    assert chain.Get(['Person.fname', 'Address.street']) == [('Lisa', '1 Lake Dr')]
+
+    chain.ClearFilters()
+    assert chain.GroupBy(['City.name'], [('count', '*')]) == [('Shelbyville', 1), ('Springfield', 2)]
+
+
+def test_Chain_BadJoins(chainDB):
+    person = chainDB.GetTable('Person')
+    address = chainDB.GetTable('Address')
+    chain = person.Join(address, 'personid', 'id')
+
+    with pytest.raises(ValueError):
+        chain.Join(address, 'id', 'Person.id')
+
+    with pytest.raises(Errors.ImaginaryColumn):
+        chain.Join(chainDB.GetTable('City'), 'id', 'Address.city')
+
+    # id is in both, the root's wins
+    assert chain._normalizeColumn('id') == 'Person.id'
+    with pytest.raises(Errors.ImaginaryColumn):
+        chain.Filter('name', ComparisonOps.EQUALS, 'Springfield')
+    with pytest.raises(Errors.ImaginaryColumn):
+        chain.Get(['fname'])
+
+# endregion
+
+# region Write Tests
+
+def test_Chain_Writes(chainDB):
+    person = chainDB.GetTable('Person')
+    city = chainDB.GetTable('City')
+    chain = person.Join(chainDB.GetTable('Address'), 'personid', 'id').Join(city, 'id', 'Address.cityid')
+    chain.CacheResults()
+
+    chain.UpdateValue('Person.fname', 'Maggie', 'Person.id', ComparisonOps.EQUALS, 4)
+    chain.Filter('Person.id', ComparisonOps.EQUALS, 4)
+    assert chain.Get(['Person.fname']) == [('Maggie',)]
+
+    # writes to any member drop the cached results
+    chain.ClearFilters()
+    chain.Filter('City.name', ComparisonOps.EQUALS, 'Capital City')
+    assert chain.Get(['Person.fname']) == []
+    city.UpdateValue('name', 'Capital City', 'id', ComparisonOps.EQUALS, 2)
+    assert chain.Get(['Person.fname']) == [('Lisa',)]
+
+    chain.ClearFilters()
+    chain.Delete('Person.fname', ComparisonOps.EQUALS, 'Maggie')
+    assert person.Count() == 3
+
+    with pytest.raises(TypeError):
+        chain.Add({'Person.fname': 'Bart'})
+
+    with pytest.raises(Errors.ImaginaryColumn):
+        chain.UpdateValue('City.name', 'Ogdenville')
+
+
+def test_Chain_Delete_Upsert(chainDB):
+    person = chainDB.GetTable('Person')
+    chain = person.Join(chainDB.GetTable('Address'), 'personid', 'id') \
+        .Join(chainDB.GetTable('City'), 'id', 'Address.cityid')
+
+    # the delete only has the root table, so conditions on the others are refused rather than run
+    with pytest.raises(Errors.ImaginaryColumn):
+        chain.Delete('City.name', ComparisonOps.EQUALS, 'Springfield')
+    chain.Filter(Or(Where('Person.id', ComparisonOps.EQUALS, 1), Where('City.name', ComparisonOps.EQUALS, 'x')))
+    with pytest.raises(Errors.ImaginaryColumn):
+        chain.Delete()
+    assert person.Count() == 4
+
+    # root columns work, with or without the table name
+    chain.ClearFilters()
+    chain.Filter('fname', ComparisonOps.EQUALS, 'Ned')
+    chain.Delete()
+    chain.Delete('fname', ComparisonOps.EQUALS, 'Lisa')
+    assert person.Get(['fname']) == [('Homer',), ('Marge',)]
+
+    with pytest.raises(TypeError):
+        chain.Upsert([{'Person.id': 1, 'Person.fname': 'Bart'}], ['Person.id'], ['Person.fname'])
+
+
+def test_Chain_Updates(chainDB):
+    person = chainDB.GetTable('Person')
+    chain = person.Join(chainDB.GetTable('Address'), 'personid', 'id') \
+        .Join(chainDB.GetTable('City'), 'id', 'Address.cityid')
+
+    # like the delete, the update only has the root table
+    chain.Filter('City.name', ComparisonOps.EQUALS, 'Springfield')
+    with pytest.raises(Errors.ImaginaryColumn):
+        chain.UpdateValue('Person.fname', 'Bart')
+    chain.ClearFilters()
+    with pytest.raises(Errors.ImaginaryColumn):
+        chain.UpdateValue('Person.fname', 'Bart', 'City.name', ComparisonOps.EQUALS, 'Springfield')
+    with pytest.raises(Errors.ImaginaryColumn):
+        chain.UpdateMany([{'Address.id': 1, 'Person.fname': 'Bart'}], 'Address.id')
+    assert person.Get(['fname']) == [('Homer',), ('Marge',), ('Lisa',), ('Ned',)]
+
+    chain.Filter('fname', ComparisonOps.EQUALS, 'Homer')
+    chain.UpdateValue('Person.fname', 'Homer J')
+    chain.ClearFilters()
+    chain.UpdateValue('Person.fname', 'Maggie', 'fname', ComparisonOps.EQUALS, 'Lisa')
+    assert chain.UpdateMany([{'Person.id': 4, 'Person.fname': 'Ned F'}], 'Person.id') == 1
+    assert person.Get(['fname']) == [('Homer J',), ('Marge',), ('Maggie',), ('Ned F',)]
+
+# endregion
@@ -0,0 +1,87 @@
+# grab the setup for the DB from here
+from Fixtures import *
+
+from Database import Database
+from MapTable import MapTable
+import Errors
+
+
+@pytest.fixture
+def mapDB(iniFile):
+    """
+    The people and wallets from the iniFile database, with a link table between them.
+    """
+    db = Database(iniFile)
+    db.GetTable('Person').AddMany([('Homer', 'Simpson'), ('Marge', 'Simpson'), ('Ned', 'Flanders')],
+                                  columns=['fname', 'lname'])
+    db.GetTable('Wallet').AddMany([(0, 10.0), (0, 20.0), (0, 30.0)], columns=['personid', 'amount'])
+    yield db
+    db.Close()
+
+
+def test_MapTable_Create(mapDB):
+    links = MapTable(mapDB.GetTable('Person'), mapDB.GetTable('Wallet'))
+    assert links.TableName == 'Person_Wallet'
+    assert list(links._columns.keys()) == ['Person_id', 'Wallet_id']
+
+    with mapDB.Connection() as conn:
+        sql = conn.execute("Select sql From sqlite_master Where name = 'Person_Wallet'").fetchone()[0]
+        assert 'Primary Key (Person_id, Wallet_id)' in sql
+        assert sql.endswith('Without RowId')
+
+        # both directions are answered from a b-tree holding the pair, without going back to the table
+        for query in ['Select Wallet_id From Person_Wallet Where Person_id = ?',
+                      'Select Person_id From Person_Wallet Where Wallet_id = ?']:
+            plan = ' '.join(r[-1] for r in conn.execute(f'Explain Query Plan {query}', (1,)))
+            assert 'COVERING INDEX' in plan or 'PRIMARY KEY' in plan
+
+    # building it again leaves the existing table and links alone
+    links.Link([(1, 1)])
+    again = MapTable(mapDB.GetTable('Person'), mapDB.GetTable('Wallet'), 'id', 'id')
+    assert list(again.Related(1)) == [1]
+
+    with pytest.raises(Errors.ImaginaryColumn):
+        MapTable(mapDB.GetTable('Person'), mapDB.GetTable('Wallet'), 'id', 'wallet')
+
+
+def test_MapTable_Link(mapDB):
+    links = MapTable(mapDB.GetTable('Person'), mapDB.GetTable('Wallet'))
+
+    assert links.Link([(1, 1), (1, 2), (2, 2), (3, 3)]) == 4
+    # the pairs already there are skipped
+    assert links.Link(iter([(1, 2), (2, 3)])) == 1
+
+    assert list(links.Related(1)) == [1, 2]
+    assert list(links.Related(2, reverse=True)) == [1, 2]
+    assert list(links.Related(4)) == []
+    assert links.Count() == 5
+
+    # a bad value rolls back the whole set
+    with pytest.raises(Errors.InvalidColumnValue):
+        links.Link([(3, 1), (3, 'two')])
+    assert list(links.Related(3)) == [3]
+
+    assert links.Unlink([(1, 2), (2, 2), (3, 1)]) == 2
+    assert list(links.Related(2, reverse=True)) == []
+    assert sorted(links.GetAll()) == [(1, 1), (2, 3), (3, 3)]
+
+
+def test_MapTable_Related_Streams(mapDB):
+    links = MapTable(mapDB.GetTable('Person'), mapDB.GetTable('Wallet'))
+    links.Link((1, w) for w in range(1, 101))
+
+    related = links.Related(1, chunk_size=10)
+    assert next(related) == 1
+    assert sum(related) == sum(range(2, 101))
+
+
+def test_MapTable_SelfReference(mapDB):
+    person = mapDB.GetTable('Person')
+    friends = MapTable(person, person)
+
+    assert friends.TableName == 'Person_Person'
+    assert list(friends._columns.keys()) == ['Person_id', 'Person_id_2']
+
+    friends.Link([(1, 2), (1, 3), (3, 1)])
+    assert list(friends.Related(1)) == [2, 3]
+    assert list(friends.Related(1, reverse=True)) == [3]
@@ -2,8 +2,15 @@
 # grab the setup for the DB from here
 from Fixtures import *
 
+import math
+import sys
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+import Tables
 from Tables import Table
 from Tables import ComparisonOps
+from Definitions import Where, And, Or, Not
 import Errors
 
 
@@ -95,6 +102,143 @@ def test_Get_DNE_Column(config, buildDBFile):
         data = t.Get(["id, name, lname"])
 
 
+def test_Iter_Chunks(config, buildDBFile):
+    t = Table(config["Person"], buildDBFile)
+
+    rows = t.Iter(['fname', 'id'], chunk_size=3)
+
+    # nothing is read until the first row is asked for
+    assert next(rows) == ('Joe', 1)
+    assert [r[0] for r in rows] == ['June', 'Jack', 'Jill', 'Joanna', 'John', 'Jane']
+
+
+def test_IterAll_Filtered(config, buildDBFile):
+    t = Table(config["Person"], buildDBFile)
+    t.Filter('lname', ComparisonOps.EQUALS, 'Smith')
+
+    data = list(t.IterAll(chunk_size=2))
+
+    assert data == t.GetAll()
+    assert len(data) == 4
+
+
+def test_Iter_DNE_Column(config, buildDBFile):
+    t = Table(config["Person"], buildDBFile)
+
+    with pytest.raises(Errors.ImaginaryColumn):
+        t.Iter(["name"])
+
+
+def test_GetColumns(config, buildDBFile):
+    t = Table(config["Person"], buildDBFile)
+
+    data = t.GetColumns(['id', 'fname', 'nickname'], chunk_size=3)
+
+    assert list(data.keys()) == ['id', 'fname', 'nickname']
+    assert data['id'] == array('q', [1, 2, 3, 4, 5, 6, 7])
+    assert data['fname'] == ['Joe', 'June', 'Jack', 'Jill', 'Joanna', 'John', 'Jane']
+    assert data['nickname'][2] is None
+
+
+def test_GetColumns_Nulls(config, buildDBFile, dirtyDB):
+    t = Table(config["Wallet"], buildDBFile)
+    t.Add({'personid': None, 'amount': None})
+
+    # the null comes in the second chunk, after the first has gone into the arrays
+    data = t.GetColumns(['personid', 'amount'], chunk_size=2)
+
+    # a null in a real column is nan, an integer column with one falls back to a list
+    assert data['amount'][:3] == array('d', [100.0, 654.85, 1010.12])
+    assert math.isnan(data['amount'][3])
+    assert data['personid'] == [1, 2, 6, None]
+
+
+def test_GetColumns_Numpy(config, buildDBFile):
+    numpy = pytest.importorskip('numpy')
+    t = Table(config["Person"], buildDBFile)
+
+    data = t.GetColumns(['id', 'fname'], as_numpy=True)
+
+    assert data['id'].dtype == numpy.int64
+    assert data['id'].sum() == 28
+    assert data['fname'].dtype == object
+
+
+def test_GetColumns_NoNumpy(config, buildDBFile, monkeypatch):
+    # numpy is only imported when it's asked for
+    monkeypatch.setitem(sys.modules, 'numpy', None)
+    t = Table(config["Person"], buildDBFile)
+
+    assert t.GetColumns(['id'])['id'] == array('q', [1, 2, 3, 4, 5, 6, 7])
+    with pytest.raises(ImportError):
+        t.GetColumns(['id'], as_numpy=True)
+
+
+def test_UseRecords(config, buildDBFile):
+    t = Table(config["Person"], buildDBFile)
+    t.UseRecords()
+
+    data = t.GetAll()
+    assert data[0].fname == 'Joe'
+    assert data[0].birthday == '1911-11-11'
+    # still a tuple underneath
+    assert data[0] == (1, 'Joe', 'Smith', 'daddy', '1911-11-11')
+    assert data[0][1] == 'Joe'
+
+    rows = list(t.Iter(['lname', 'id'], chunk_size=2))
+    assert rows[6].lname == 'Doe'
+    assert rows[6].id == 7
+
+    t.UseRecords(False)
+    assert type(t.GetAll()[0]) is tuple
+
+
+def test_OrderBy(config, buildDBFile):
+    t = Table(config["Person"], buildDBFile)
+
+    t.OrderBy('lname')
+    t.OrderBy('fname', descending=True)
+    data = t.Get(['fname', 'lname'])
+    assert data[0] == ('Joanna', 'Dane')
+    assert data[1] == ('John', 'Doe')
+    assert data[2] == ('Jane', 'Doe')
+    assert data[-1] == ('Jack', 'Smith')
+
+    assert [r[0] for r in t.Iter(['id'])] == [r[0] for r in t.Get(['id'])]
+
+    t.ClearOrder()
+    assert t.Get(['id'])[0][0] == 1
+
+
+def test_GetPage_Offset(config, buildDBFile):
+    t = Table(config["Person"], buildDBFile)
+
+    assert t.GetPage(['id'], 'id', size=3) == [(1,), (2,), (3,)]
+    assert t.GetPage(['id'], 'id', size=3, offset=6) == [(7,)]
+    assert t.GetPage(['id'], 'id', size=2, descending=True) == [(7,), (6,)]
+
+
+def test_GetPage_Keyset(config, buildDBFile):
+    t = Table(config["Person"], buildDBFile)
+    t.Filter('lname', ComparisonOps.NOTEQ, 'Dane')
+
+    pages = []
+    page = t.GetPage(['id', 'fname'], 'id', size=2)
+    while page:
+        pages.append([r[0] for r in page])
+        page = t.GetPage(['id', 'fname'], 'id', after=page[-1][0], size=2)
+
+    assert pages == [[1, 2], [3, 4], [6, 7]]
+
+    # every page after the first reused the one statement
+    assert t.QueryCacheMisses == 2
+
+    assert t.GetPage(['id'], 'id', after=3, size=5, descending=True) == [(2,), (1,)]
+
+    with pytest.raises(Errors.InvalidColumnValue):
+        t.GetPage(['id'], 'id', after='three')
+
+
 # endregion
 
 # region Filter Tests
@@ -160,6 +304,114 @@ def test_Filter_InvalidValue(config, buildDBFile):
     # just to be safe
     t.ClearFilters()
 
+
+def test_Filter_InList(config, buildDBFile):
+    t = Table(config["Person"], buildDBFile)
+
+    t.Filter('fname', ComparisonOps.IN, ['Joe', 'Jill', 'Nobody'])
+    assert t.Get(['id']) == [(1,), (4,)]
+
+    # same shape, so the sql is reused
+    t.ClearFilters()
+    t.Filter('fname', ComparisonOps.IN, ('Jane', 'John', 'June'))
+    assert t.Get(['id']) == [(2,), (6,), (7,)]
+    assert t.QueryCacheHits == 1
+
+    # a longer list needs more placeholders
+    t.ClearFilters()
+    t.Filter('id', ComparisonOps.IN, [1, 2, 3, 4])
+    assert len(t.Get(['id'])) == 4
+    assert t.QueryCacheMisses == 2
+
+    with pytest.raises(Errors.InvalidColumnValue):
+        t.Filter('id', ComparisonOps.IN, [1, 'two'])
+
+
+def test_Filter_LargeInList(config, buildDBFile, dirtyDB):
+    t = Table(config["Person"], buildDBFile)
+    t.InListThreshold = 3
+
+    t.Filter('fname', ComparisonOps.IN, ['Joe', 'Jill', 'June', 'Nobody', 'Joe'])
+    assert t.Get(['id']) == [(1,), (2,), (4,)]
+
+    # the list length doesn't change the sql once it's past the threshold
+    t.ClearFilters()
+    t.Filter(Or(Where('id', ComparisonOps.IN, list(range(5, 100))), Where('id', ComparisonOps.IN, [1, 2])))
+    assert sorted(t.Get(['id'])) == [(1,), (2,), (5,), (6,), (7,)]
+    assert t.Count() == 5
+
+    t.ClearFilters()
+    t.Filter('fname', ComparisonOps.IN, ['Jack', 'Jane', 'Joanna', 'John'])
+    assert t.Get(['id']) == [(3,), (5,), (6,), (7,)]
+    assert t.QueryCacheHits == 1
+
+    t.ClearFilters()
+    t.Filter('id', ComparisonOps.IN, list(range(3, 200)))
+    t.Delete()
+    t.ClearFilters()
+    assert t.Get(['id']) == [(1,), (2,)]
+
+
+def test_Filter_LargeInList_TempTable(config, buildDBFile, dirtyDB, monkeypatch):
+    # values json can't carry exactly go through the temp table instead
+    monkeypatch.setattr(Tables, '_JSON_EACH', False)
+    t = Table(config["Person"], buildDBFile)
+    t.InListThreshold = 3
+
+    def leftover():
+        return buildDBFile.execute('select count(*) from temp.litedao_in').fetchone()[0]
+
+    t.Filter('fname', ComparisonOps.IN, ['Joe', 'Jill', 'June', 'Nobody', 'Joe'])
+    assert t.Get(['id']) == [(1,), (2,), (4,)]
+    assert leftover() == 0
+    assert any('litedao_in' in line for line in t.Explain(['id']))
+
+    # a stream only drops its values once it's closed
+    t.ClearFilters()
+    t.Filter('id', ComparisonOps.IN, list(range(3, 200)))
+    rows = t.Iter(['id'], chunk_size=1)
+    assert next(rows) == (3,)
+    assert leftover() == 197
+    rows.close()
+    assert leftover() == 0
+
+    t.Delete()
+    t.ClearFilters()
+    assert t.Get(['id']) == [(1,), (2,)]
+    assert leftover() == 0
+
+
+def test_Filter_Expression(config, buildDBFile):
+    t = Table(config["Person"], buildDBFile)
+
+    t.Filter('id', ComparisonOps.BETWEEN, (2, 6))
+    assert t.Get(['id']) == [(2,), (3,), (4,), (5,), (6,)]
+
+    # filters added separately are still and'ed together
+    t.Filter(Or(Where('lname', ComparisonOps.EQUALS, 'Doe'),
+                Not(Where('nickname', ComparisonOps.IS, None))))
+    assert t.Get(['fname']) == [('June',), ('Joanna',), ('John',)]
+
+    t.ClearFilters()
+    t.Filter(Not(And(Where('lname', ComparisonOps.EQUALS, 'Smith'), Where('id', ComparisonOps.GREATER, 1))))
+    assert t.Get(['id']) == [(1,), (5,), (6,), (7,)]
+
+    with pytest.raises(ValueError):
+        t.Filter('id', ComparisonOps.BETWEEN, 2)
+
+    with pytest.raises(Errors.ImaginaryColumn):
+        t.Filter(Or(Where('name', ComparisonOps.EQUALS, 'Doe')))
+
+    # only IN and BETWEEN take a list, anything else is one value
+    with pytest.raises(Errors.InvalidColumnValue):
+        t.Filter('id', ComparisonOps.EQUALS, (1, 2))
+
+    # a column name still needs an operator
+    with pytest.raises(ValueError):
+        t.Filter('lname')
+    with pytest.raises(ValueError):
+        t.Filter(And(Where('lname', ComparisonOps.Noop, 'Doe')))
+
 # endregion
 
 # region Validator Tests
@@ -184,6 +436,20 @@ def test_Validator(config, buildDBFile):
     t.ClearFilters()
 
 
+def test_ValidateRows(config, buildDBFile):
+    t = Table(config["Person"], buildDBFile)
+
+    bad = t.ValidateRows([{'fname': 'Joe', 'lname': 'Smith'},
+                          {'fname': 10, 'lname': 'Smith', 'id': 'one'},
+                          {'fname': 'Jack', 'nickname': 3}])
+    assert bad == {1: ['fname', 'id'], 2: ['nickname']}
+
+    bad = t.ValidateRows([('Joe', 'Smith'), ('June', None), (1.0, 2)], columns=['fname', 'lname'])
+    assert bad == {2: ['fname', 'lname']}
+
+    assert t.ValidateRows([('Joe', 'Smith')], columns=['fname', 'lname']) == {}
+
+
 # endregion
 
 # region Add Tests
@@ -286,6 +552,134 @@ def test_Add_InvalidColumn(config, buildDBFile):
 
 # endregion
 
+# region AddMany Tests
+
+def test_AddMany_Dicts(config, buildDBFile, dirtyDB):
+    t = Table(config["Person"], buildDBFile)
+
+    count = t.AddMany([{'fname': 'Bulk', 'lname': 'One'},
+                       {'fname': 'Bulk', 'lname': 'Two', 'nickname': 'B2'},
+                       {'fname': 'Bulk', 'lname': 'Three', 'birthday': '2000-01-01'}], batch_size=2)
+    assert count == 3
+
+    t.Filter('fname', ComparisonOps.EQUALS, 'Bulk')
+    data = t.GetAll()
+
+    assert len(data) == 3
+    assert data[0][2] == "One"
+    assert data[0][3] == ''
+    assert data[1][2] == "Two"
+    assert data[1][3] == 'B2'
+    assert data[2][2] == "Three"
+    assert data[2][4] == '2000-01-01'
+
+
+def test_AddMany_Tuples(config, buildDBFile, dirtyDB):
+    t = Table(config["Person"], buildDBFile)
+
+    count = t.AddMany((('Tup', str(i)) for i in range(25)), columns=['fname', 'lname'], batch_size=10)
+    assert count == 25
+
+    t.Filter('fname', ComparisonOps.EQUALS, 'Tup')
+    data = t.Get(['lname', 'nickname'])
+
+    assert len(data) == 25
+    assert data[24][0] == '24'
+    assert data[24][1] == ''
+
+
+def test_AddMany_InvalidValue(config, buildDBFile, dirtyDB):
+    t = Table(config["Person"], buildDBFile)
+
+    with pytest.raises(Errors.InvalidColumnValue):
+        t.AddMany([{'fname': 'Bad', 'lname': 10}])
+
+    with pytest.raises(Errors.ImaginaryColumn):
+        t.AddMany([('Bad', 'Column')], columns=['fname', 'name'])
+
+    # nothing should have been written
+    t.Filter('fname', ComparisonOps.EQUALS, 'Bad')
+    assert len(t.GetAll()) == 0
+
+
+def test_AddMany_LaterBatchFails(config, buildDBFile, dirtyDB):
+    t = Table(config["Person"], buildDBFile)
+
+    # the bad value is in the third batch, the first two have to be rolled back too
+    rows = [('Batch', str(i)) for i in range(5)] + [('Batch', 5)]
+    with pytest.raises(Errors.InvalidColumnValue):
+        t.AddMany(rows, columns=['fname', 'lname'], batch_size=2)
+
+    t.Filter('fname', ComparisonOps.EQUALS, 'Batch')
+    assert t.GetAll() == []
+
+# endregion
+
+# region Upsert Tests
+
+def test_Upsert(config, buildDBFile, dirtyDB):
+    t = Table(config["Person"], buildDBFile)
+
+    inserted, updated = t.Upsert([{'id': 1, 'fname': 'Joseph', 'lname': 'Smith'},
+                                  {'id': 2, 'fname': 'Junebug', 'lname': 'Smith'},
+                                  {'fname': 'Upsert', 'lname': 'New'}], ['id'], ['fname'], batch_size=2)
+    assert (inserted, updated) == (1, 2)
+
+    data = t.Get(['fname', 'nickname'])
+    assert data[0] == ('Joseph', 'daddy')
+    assert data[1] == ('Junebug', 'Mommy')
+    assert data[7] == ('Upsert', '')
+
+    # tuples follow the conflict then update columns
+    assert t.Upsert([(3, 'Smith'), (50, 'Tuple')], ['id'], ['lname'], columns=['id', 'lname']) == (1, 1)
+    t.Filter('id', ComparisonOps.EQUALS, 50)
+    assert t.Get(['fname', 'lname']) == [('', 'Tuple')]
+
+    # existing rows are left alone
+    t.ClearFilters()
+    assert t.Upsert([(1, 'Ignored')], ['id'], [], columns=['id', 'fname']) == (0, 0)
+    assert t.Get(['fname'])[0] == ('Joseph',)
+
+
+def test_Upsert_Invalid(config, buildDBFile, dirtyDB):
+    t = Table(config["Person"], buildDBFile)
+
+    with pytest.raises(ValueError):
+        t.Upsert([('Smith', 'Joe')], ['lname'], ['fname'])
+
+    # the bad value is in the second batch, the first has to be rolled back too
+    with pytest.raises(Errors.InvalidColumnValue):
+        t.Upsert([(1, 'First'), (2, 10)], ['id'], ['fname'], batch_size=1)
+
+    assert t.Get(['fname'])[0] == ('Joe',)
+
+
+def test_Upsert_Counts(config, buildDBFile, dirtyDB):
+    t = Table(config["Person"], buildDBFile)
+
+    # a trigger's changes don't count, and a key repeated in the batch is inserted once then updated
+    with t._pool.Checkout() as conn:
+        conn.execute("Create Trigger upsert_log After Update On Person Begin "
+                     "Update Person Set nickname = 'logged' Where id = 2; End")
+        conn.commit()
+
+    traced = []
+    with t._pool.Checkout() as conn:
+        conn.set_trace_callback(traced.append)
+        try:
+            rows = [(1, 'One'), (60, 'New'), (60, 'Again'), (61, 'Other'), (None, 'NoKey')]
+            assert t.Upsert(rows, ['id'], ['fname'], columns=['id', 'fname'], batch_size=3) == (3, 2)
+        finally:
+            conn.set_trace_callback(None)
+
+    # the existing keys are looked up, the table is never counted
+    assert not any(q.startswith('Select count(*) From Person') for q in traced)
+
+    t.Filter('id', ComparisonOps.GREATER, 50)
+    assert t.Get(['fname']) == [('Again',), ('Other',), ('NoKey',)]
+
+# endregion
+
 # region Delete Tests
 
 def test_DeleteOne(config, buildDBFile, dirtyDB):
@@ -703,6 +1097,42 @@ def test_Update_BadFilterValue(config, buildDBFile):
     assert data[6][3] == "Grams"
     assert data[6][4] == '1024-01-28'
 
+
+def test_UpdateMany(config, buildDBFile, dirtyDB):
+    t = Table(config["Person"], buildDBFile)
+
+    count = t.UpdateMany([{'id': 1, 'nickname': 'Pa', 'birthday': '1911-11-12'},
+                          {'id': 2, 'nickname': 'Ma', 'birthday': '2222-02-23'},
+                          {'id': 3, 'nickname': 'Jacko'},
+                          {'id': 99, 'nickname': 'Nobody'}], 'id', batch_size=1)
+    assert count == 3
+
+    data = t.Get(['nickname', 'birthday'])
+    assert data[0] == ('Pa', '1911-11-12')
+    assert data[1] == ('Ma', '2222-02-23')
+    assert data[2] == ('Jacko', '2001-10-01')
+
+    assert t.UpdateMany([('Dane', 'Danes'), ('Doe', 'Does')], 'lname', columns=['lname', 'nickname']) == 3
+    t.Filter('lname', ComparisonOps.EQUALS, 'Doe')
+    assert t.Get(['nickname']) == [('Does',), ('Does',)]
+
+
+def test_UpdateMany_Invalid(config, buildDBFile, dirtyDB):
+    t = Table(config["Person"], buildDBFile)
+
+    # the bad value is in the second batch, the first has to be rolled back too
+    with pytest.raises(Errors.InvalidColumnValue):
+        t.UpdateMany([{'id': 1, 'fname': 'First'}, {'id': 2, 'fname': 10}], 'id', batch_size=1)
+
+    with pytest.raises(Errors.ImaginaryColumn):
+        t.UpdateMany([{'id': 1, 'name': 'First'}], 'id')
+
+    with pytest.raises(ValueError):
+        t.UpdateMany([{'fname': 'First'}], 'id')
+
+    assert t.Get(['fname'])[0] == ('Joe',)
+
+
 # endregion
 
 # region SQL Tests
@@ -716,4 +1146,285 @@ def test_BuildSQL(config, buildDBFile):
 
     assert tsql.lower() == actual.lower()
 
-# endregion
\ No newline at end of file
+# endregion
+# region Query Cache Tests
+
+def test_QueryCache_Hits(config, buildDBFile):
+    t = Table(config["Person"], buildDBFile)
+
+    t.Get(['fname'])
+    assert t.QueryCacheMisses == 1
+    assert t.QueryCacheHits == 0
+
+    t.Get(['fname'])
+    assert t.QueryCacheMisses == 1
+    assert t.QueryCacheHits == 1
+
+    # a different column list is a different shape
+    t.Get(['fname', 'lname'])
+    assert t.QueryCacheMisses == 2
+
+
+def test_QueryCache_FilterShape(config, buildDBFile):
+    t = Table(config["Person"], buildDBFile)
+
+    t.Filter('lname', ComparisonOps.EQUALS, 'Doe')
+    assert len(t.Get(['fname'])) == 2
+
+    # same shape, new value - should reuse the sql but use the new parameter
+    t.ClearFilters()
+    t.Filter('lname', ComparisonOps.EQUALS, 'Smith')
+    assert len(t.Get(['fname'])) == 4
+    assert t.QueryCacheHits == 1
+
+    # new operator, new shape
+    t.ClearFilters()
+    t.Filter('lname', ComparisonOps.NOTEQ, 'Smith')
+    assert len(t.Get(['fname'])) == 3
+    assert t.QueryCacheMisses == 2
+
+
+def test_QueryCache_InLineValidation(config, buildDBFile):
+    t = Table(config["Person"], buildDBFile)
+
+    t.UpdateValue('nickname', 'Mimi', 'lname', ComparisonOps.IS, 'Dane')
+
+    # the cached statement should still validate the in-line value
+    with pytest.raises(Errors.InvalidColumnValue):
+        t.UpdateValue('nickname', 'Mimi', 'lname', ComparisonOps.IS, 10)
+
+
+def test_QueryCache_Eviction(config, buildDBFile):
+    t = Table(config["Person"], buildDBFile)
+    t.QueryCacheSize = 2
+
+    t.Get(['id'])
+    t.Get(['fname'])
+    t.Get(['lname'])
+
+    # id was the least recently used, so it had to be rebuilt
+    t.Get(['id'])
+    assert t.QueryCacheMisses == 4
+    assert t.QueryCacheHits == 0
+
+
+def test_QueryCache_Threads(config, buildDBFile):
+    t = Table(config["Person"], buildDBFile)
+    t.QueryCacheSize = 1
+
+    # half the threads build one query and half another, each pushes out the entry the others are looking up
+    def hammer(i):
+        for _ in range(20000):
+            t._buildQuery('select', [['id', 'fname'][i % 2]])
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(max_workers=4) as ex:
+            list(ex.map(hammer, range(4)))
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert t.QueryCacheHits + t.QueryCacheMisses == 80000
+
+# endregion
+
+# region Result Cache Tests
+
+def test_ResultCache_Hits(config, buildDBFile):
+    t = Table(config["Person"], buildDBFile)
+    t.CacheResults()
+
+    first = t.GetAll()
+    assert t.GetAll() == first
+    assert t.ResultCacheHits == 1
+    assert t.ResultCacheMisses == 1
+
+    # the filter values are part of the key
+    t.Filter('lname', ComparisonOps.EQUALS, 'Doe')
+    assert len(t.GetAll()) == 2
+    t.ClearFilters()
+    t.Filter('lname', ComparisonOps.EQUALS, 'Smith')
+    assert len(t.GetAll()) == 4
+    assert t.ResultCacheMisses == 3
+    assert t.ResultCacheHitRatio == 0.25
+
+
+def test_ResultCache_Invalidate(config, buildDBFile, dirtyDB):
+    t = Table(config["Person"], buildDBFile)
+    t.CacheResults()
+
+    assert len(t.GetAll()) == 7
+    t.Add({'fname': 'Cache', 'lname': 'Buster'})
+    assert len(t.GetAll()) == 8
+
+    t.UpdateValue('nickname', 'CB', 'fname', ComparisonOps.EQUALS, 'Cache')
+    t.Filter('fname', ComparisonOps.EQUALS, 'Cache')
+    assert t.Get(['nickname'])[0][0] == 'CB'
+
+    t.Delete('fname', ComparisonOps.EQUALS, 'Cache')
+    assert len(t.Get(['nickname'])) == 0
+    assert t.ResultCacheHits == 0
+
+
+def test_ResultCache_Eviction(config, buildDBFile):
+    t = Table(config["Person"], buildDBFile)
+    t.CacheResults(size=2)
+
+    t.Get(['id'])
+    t.Get(['fname'])
+    t.Get(['lname'])
+    assert t.ResultCacheEvictions == 1
+
+    # id was pushed out
+    t.Get(['id'])
+    assert t.ResultCacheHits == 0
+
+    # everything expires straight away
+    t.CacheResults(ttl=0)
+    t.Get(['id'])
+    t.Get(['id'])
+    assert t.ResultCacheHits == 0
+    assert t.ResultCacheEvictions == 1
+
+
+def test_ResultCache_Threads(config, buildDBFile):
+    t = Table(config["Person"], buildDBFile)
+    t.CacheResults(ttl=0)
+    state = t._resultState()
+
+    # every read finds the entry expired and drops it, while the others are storing and dropping the same one
+    def hammer(_):
+        for _ in range(5000):
+            t._cacheResult(('k',), [], state)
+            t._cachedResult(('k',))
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(max_workers=4) as ex:
+            list(ex.map(hammer, range(4)))
+    finally:
+        sys.setswitchinterval(interval)
+
+# endregion
+
+# region Aggregate Tests
+
+def test_Aggregates(config, buildDBFile):
+    t = Table(config["Person"], buildDBFile)
+
+    assert t.Count() == 7
+    assert t.Count('nickname') == 5
+    assert t.Min('birthday') == '1024-01-28'
+    assert t.Max('fname') == 'June'
+    assert t.Sum('id') == 28
+    assert t.Avg('id') == 4.0
+
+    t.Filter('lname', ComparisonOps.EQUALS, 'Smith')
+    assert t.Count() == 4
+    assert t.Sum('id') == 10
+
+    t.Filter('lname', ComparisonOps.EQUALS, 'Nobody')
+    assert t.Count() == 0
+    assert t.Sum('id') is None
+
+    with pytest.raises(Errors.ImaginaryColumn):
+        t.Sum('name')
+
+
+def test_GroupBy(config, buildDBFile):
+    t = Table(config["Person"], buildDBFile)
+
+    groups = t.GroupBy(['lname'], [('count', '*'), ('max', 'id')])
+    assert groups == [('Dane', 1, 5), ('Doe', 2, 7), ('Smith', 4, 4)]
+
+    t.Filter('id', ComparisonOps.GREATER, 2)
+    assert t.GroupBy(['lname'], [('COUNT', 'nickname')]) == [('Dane', 1), ('Doe', 2), ('Smith', 0)]
+
+    with pytest.raises(ValueError):
+        t.GroupBy(['lname'], [('drop table Person; --', 'id')])
+
+    with pytest.raises(Errors.ImaginaryColumn):
+        t.GroupBy(['lname'], [('sum', '*')])
+
+# endregion
+
+# region Query Plan Tests
+
+def test_Explain_Scan(config, buildDBFile):
+    t = Table(config["Person"], buildDBFile)
+
+    plan = t.Explain(['fname'])
+    assert len(plan) == 1
+    assert plan[0].startswith('SCAN')
+
+
+def test_Explain_Search(config, buildDBFile):
+    t = Table(config["Person"], buildDBFile)
+    t.Filter('id', ComparisonOps.EQUALS, 3)
+
+    plan = t.Explain(['fname'])
+    assert plan[0].startswith('SEARCH')
+
+
+def test_WarnOnScan(config, buildDBFile, caplog):
+    t = Table(config["Person"], buildDBFile)
+
+    # default threshold is well over the size of the test table
+    t.WarnOnScan()
+    t.GetAll()
+    assert len(caplog.records) == 0
+
+    t.WarnOnScan(5)
+    t.GetAll()
+    assert len(caplog.records) == 1
+    assert 'scans 7 rows of Person' in caplog.records[0].getMessage()
+
+    # every run of the query is checked
+    t.GetAll()
+    assert len(caplog.records) == 2
+
+    # searches are fine
+    t.Filter('id', ComparisonOps.EQUALS, 3)
+    t.GetAll()
+    assert len(caplog.records) == 2
+
+
+def test_WarnOnScan_Grows(config, buildDBFile, dirtyDB, caplog):
+    t = Table(config["Person"], buildDBFile)
+
+    # the plan is read while the table is small, a scan of it is fine then but not once it grows
+    t.WarnOnScan(100)
+    t.Filter('fname', ComparisonOps.EQUALS, 'Grown')
+    t.Get(['id'])
+    assert len(caplog.records) == 0
+
+    t.AddMany([('Grown', str(i)) for i in range(1000)], columns=['fname', 'lname'])
+    t.Get(['id'])
+    assert len(caplog.records) == 1
+    assert 'rows of Person' in caplog.records[0].getMessage()
+
+
+def test_WarnOnScan_NoCount(config, buildDBFile, caplog, monkeypatch):
+    t = Table(config["Person"], buildDBFile)
+    statements = []
+    buildDBFile.set_trace_callback(statements.append)
+
+    # the size is estimated, the table isn't read just to warn about reading it
+    t.WarnOnScan(5)
+    t.GetAll()
+    assert 'scans 7 rows of Person' in caplog.records[0].getMessage()
+    assert not any('count(' in s.lower() for s in statements)
+
+    # the temp table of a large IN filter isn't a table worth warning about
+    monkeypatch.setattr(Tables, '_JSON_EACH', False)
+    t.WarnOnScan(0)
+    t.InListThreshold = 2
+    t.Filter('fname', ComparisonOps.IN, ['Joe', 'Jill', 'Jack'])
+    t.GetAll()
+    assert not any('rows of litedao_in' in r.getMessage() for r in caplog.records)
+
+    buildDBFile.set_trace_callback(None)
+
+# endregion